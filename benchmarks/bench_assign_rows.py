@@ -0,0 +1,82 @@
+"""Time row assignment on a single heavily overlapping (category, country) group.
+
+Compares the heap-based ``pack_lanes`` with the previous linear first-fit
+slot scan, and the dict-based row ordering with ``list.index`` sort keys.
+
+Usage: python benchmarks/bench_assign_rows.py [--sizes 1000 5000 10000]
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+import dash
+
+# Importing a page outside a running app requires a no-op register_page
+dash.register_page = lambda *a, **k: None
+from pages.timeline import assign_rows, pack_lanes  # noqa: E402
+
+
+def make_group(n, seed=0):
+    """``n`` events in one group, each overlapping roughly a tenth of the others."""
+    rng = random.Random(seed)
+    origin = date(1000, 1, 1)
+    events = []
+    for i in range(n):
+        start = origin + timedelta(days=rng.randint(0, 10 * n))
+        end = start + timedelta(days=rng.randint(n // 2, 2 * n))
+        events.append({"tag": f"ev{i}", "category": "Politics", "country": "Global",
+                       "date_start": start.isoformat(), "date_end": end.isoformat()})
+    return events
+
+
+def linear_first_fit(spans):
+    """The slot search used before ``pack_lanes``."""
+    slots, indices = [], []
+    for start, end in spans:
+        for idx, last_end in enumerate(slots):
+            if start >= last_end:
+                slots[idx] = end
+                break
+        else:
+            idx = len(slots)
+            slots.append(end)
+        indices.append(idx)
+    return indices, len(slots)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 5_000, 10_000])
+    args = parser.parse_args()
+
+    print(f"{'events':>8} {'rows':>6} {'linear ms':>10} {'heap ms':>9} "
+          f"{'index() ms':>11} {'dict ms':>8}")
+    for n in args.sizes:
+        events = make_group(n)
+        spans = sorted((e["date_start"], e["date_end"]) for e in events)
+        linear, expected = timed(lambda: linear_first_fit(spans))
+        heap, result = timed(lambda: pack_lanes(spans))
+        assert result == expected
+
+        row_order, _ = assign_rows(events)
+        row_index = {row_id: idx for idx, row_id in enumerate(row_order)}
+        by_index, _ = timed(lambda: sorted(
+            events, key=lambda e: (row_order.index(e["row_id"]), e["date_start"])))
+        by_dict, _ = timed(lambda: sorted(
+            events, key=lambda e: (row_index[e["row_id"]], e["date_start"])))
+        print(f"{n:>8} {len(row_order):>6} {1000 * linear:>10.1f} {1000 * heap:>9.1f} "
+              f"{1000 * by_index:>11.1f} {1000 * by_dict:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
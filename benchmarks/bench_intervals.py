@@ -0,0 +1,79 @@
+"""Compare the interval index with the linear date scan in ``filter_events``.
+
+Usage: python benchmarks/bench_intervals.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+import dash
+
+# Importing a page outside a running app requires a no-op register_page
+dash.register_page = lambda *a, **k: None
+from pages.timeline import filter_events  # noqa: E402
+from intervals import IntervalIndex  # noqa: E402
+
+
+def make_events(n, seed=0):
+    """Events spread over roughly 3000 years, a third of them instants."""
+    rng = random.Random(seed)
+    events = []
+    for i in range(n):
+        start = rng.randint(0, 3000 * 365)
+        year, day = 1 + start // 365, start % 365
+        date_start = f"{year:04d}-{1 + day // 31 % 12:02d}-{1 + day % 28:02d}"
+        date_end = None
+        if rng.random() > 0.33:
+            end_year = min(year + rng.randint(0, 30), 9999)
+            date_end = f"{end_year:04d}-12-31"
+        events.append({"tag": f"ev{i}", "date_start": date_start, "date_end": date_end})
+    return events
+
+
+def windows(count, seed=1):
+    """Random zoom windows between one and fifty years wide."""
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        year = rng.randint(1, 2950)
+        result.append((f"{year:04d}-01-01", f"{year + rng.randint(1, 50):04d}-12-31"))
+    return result
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'events':>10} {'build s':>9} {'scan ms':>9} {'index ms':>9} {'speedup':>8} {'avg hits':>9}")
+    for n in args.sizes:
+        events = make_events(n)
+        build, index = timed(lambda: IntervalIndex(events), 1)
+        queries = windows(args.queries)
+        scan_total = index_total = hits = 0.0
+        for start, end in queries:
+            scan, expected = timed(lambda: filter_events(events, start_date=start, end_date=end), 1)
+            query, found = timed(lambda: index.overlapping(start, end), 3)
+            assert len(found) == len(expected)
+            scan_total += scan
+            index_total += query
+            hits += len(found)
+        scan_ms = 1000 * scan_total / len(queries)
+        index_ms = 1000 * index_total / len(queries)
+        print(f"{n:>10} {build:>9.2f} {scan_ms:>9.2f} {index_ms:>9.3f} "
+              f"{scan_ms / index_ms:>7.0f}x {hits / len(queries):>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Time every stage of the timeline pipeline on synthetic data.
+
+For each size the events from ``synthetic.py`` are bulk-loaded into a fresh
+database, then the stages the timeline callback goes through are timed: the
+first query of a data version (answered by SQLite while the interval index
+is built in the background), the window count, the query for a viewport zoomed in far enough to
+draw bars, row assignment, figure build and JSON serialization, and the
+whole ``cached_timeline_figure`` call for the overview and the zoomed
+viewport. A short run of the CRUD path (insert, update, delete) follows. Peak traced memory is recorded per stage in a
+second, traced run. Results are written as JSON so runs on different commits
+can be compared with ``--compare``.
+
+Usage: python benchmarks/bench_pipeline.py [--sizes 1000 10000 100000 1000000]
+                                           [--output results.json] [--compare old.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+import dash
+import plotly.io as pio
+
+# Importing a page outside a running app requires a no-op register_page
+dash.register_page = lambda *a, **k: None
+import db  # noqa: E402
+from pages import timeline  # noqa: E402
+from synthetic import write_jsonl  # noqa: E402
+
+STAGES = ("query_cold", "count", "query", "assign_rows", "figure", "serialize", "overview",
+          "zoomed")
+CRUD_OPS = 200
+
+
+def measure(fn, trace):
+    """Run ``fn`` once; return ``(seconds, peak bytes or None, result)``."""
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    peak = None
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds, peak, result
+
+
+def run_stages(trace):
+    """Run the timeline render path once; return ``{stage: (seconds, peak)}``."""
+    db._event_cache.clear()
+    db._derived_indexes.clear()
+    timeline._figure_cache.clear()
+    results = {}
+    facets = db.get_facets()
+    low, high = db.date_bounds()
+    # Half the categories and the middle half of the time span
+    categories = facets["categories"][: max(1, len(facets["categories"]) // 2)]
+    start = f"{(int(low[:4]) * 3 + int(high[:4])) // 4:04d}-01-01"
+    end = f"{(int(low[:4]) + int(high[:4]) * 3) // 4:04d}-12-31"
+    # The first query of a data version is answered by SQLite while the
+    # interval index is built in the background; later stages use the index
+    seconds, peak, _ = measure(lambda: db.query_events(categories, None, start, end), trace)
+    results["query_cold"] = (seconds, peak)
+    if db._warm_thread is not None:
+        db._warm_thread.join()
+    seconds, peak, count = measure(lambda: db.count_events(categories, None, start, end), trace)
+    results["count"] = (seconds, peak)
+    # Zoom into the middle until roughly as many events are in view as get drawn as bars
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    span = (last - first) * min(1.0, 0.8 * timeline.LOD_MAX_BARS / max(count, 1))
+    middle = first + (last - first) / 2
+    viewport = ((middle - span / 2).isoformat(), (middle + span / 2).isoformat())
+    seconds, peak, events = measure(lambda: db.query_events(categories, None, *viewport), trace)
+    results["query"] = (seconds, peak)
+    seconds, peak, _ = measure(lambda: timeline.assign_rows(events), trace)
+    results["assign_rows"] = (seconds, peak)
+    # make_timeline_figure assigns rows itself, so it gets fresh copies
+    copies = [dict(ev) for ev in events]
+    seconds, peak, figure = measure(lambda: timeline.make_timeline_figure(copies), trace)
+    results["figure"] = (seconds, peak)
+    seconds, peak, _ = measure(lambda: pio.to_json(figure, validate=False), trace)
+    results["serialize"] = (seconds, peak)
+    seconds, peak, _ = measure(
+        lambda: timeline.cached_timeline_figure(categories, None, start, end), trace)
+    results["overview"] = (seconds, peak)
+    seconds, peak, _ = measure(
+        lambda: timeline.cached_timeline_figure(categories, None, start, end, viewport=viewport),
+        trace)
+    results["zoomed"] = (seconds, peak)
+    results["_in_window"] = count
+    results["_drawn"] = len(events)
+    return results
+
+
+def run_crud(ops):
+    """Time ``ops`` inserts, updates and deletes; return seconds per operation."""
+    timings = {}
+    start = time.perf_counter()
+    for i in range(ops):
+        db.insert_event("Politics", "Crud", f"Crud {i}", "Global", "1500-01-01", None,
+                        "benchmark row", f"crud{i}", "", "syn0")
+    timings["insert"] = (time.perf_counter() - start) / ops
+    ids = [ev["id"] for ev in db.get_event_labels([f"crud{i}" for i in range(ops)])]
+    start = time.perf_counter()
+    for event_id in ids:
+        db.update_event(event_id, description="updated", affects="syn1")
+    timings["update"] = (time.perf_counter() - start) / ops
+    start = time.perf_counter()
+    for event_id in ids:
+        db.delete_event(event_id)
+    timings["delete"] = (time.perf_counter() - start) / ops
+    return timings
+
+
+def bench_size(n, args):
+    """Load ``n`` synthetic events into a temporary database and time the pipeline."""
+    workdir = tempfile.mkdtemp(prefix="timeline-bench-")
+    data = write_jsonl(os.path.join(workdir, "events.jsonl"), n, seed=args.seed,
+                       categories=args.categories, countries=args.countries,
+                       overlap=args.overlap, links=args.links, instants=args.instants)
+    db.DB_FILE = os.path.join(workdir, "events.db")
+    db.init_db()
+    loaded = db.import_events(data)
+    untraced = run_stages(trace=False)
+    traced = run_stages(trace=True) if not args.no_memory else {}
+    result = {
+        "events": loaded["inserted"],
+        "links": loaded["links"],
+        "in_window": untraced.pop("_in_window"),
+        "drawn": untraced.pop("_drawn"),
+        "import_seconds": loaded["seconds"],
+        "stages": {
+            stage: {"seconds": untraced[stage][0],
+                    "peak_bytes": traced[stage][1] if traced else None}
+            for stage in STAGES
+        },
+        "crud_seconds_per_op": run_crud(args.crud_ops),
+    }
+    db.close_pool()
+    for name in os.listdir(workdir):
+        os.unlink(os.path.join(workdir, name))
+    os.rmdir(workdir)
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    """Print seconds and peak MiB per stage, with the ratio to ``baseline`` if given."""
+    old = {run["events"]: run for run in (baseline or {}).get("runs", [])}
+    print(f"{'events':>9} {'stage':<12} {'ms':>10} {'peak MiB':>9}" + (f" {'vs base':>8}" if old else ""))
+    for run in results["runs"]:
+        for stage, timing in run["stages"].items():
+            peak = timing["peak_bytes"]
+            line = (f"{run['events']:>9} {stage:<12} {1000 * timing['seconds']:>10.1f} "
+                    f"{peak / 2 ** 20 if peak is not None else float('nan'):>9.1f}")
+            base = old.get(run["events"], {}).get("stages", {}).get(stage)
+            if base and base["seconds"]:
+                line += f" {timing['seconds'] / base['seconds']:>7.2f}x"
+            print(line)
+        crud = ", ".join(f"{op} {1000 * s:.2f} ms" for op, s in run["crud_seconds_per_op"].items())
+        print(f"{run['events']:>9} {'crud':<12} {crud}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--categories", type=int, default=5)
+    parser.add_argument("--countries", type=int, default=20)
+    parser.add_argument("--overlap", type=float, default=4.0)
+    parser.add_argument("--links", type=float, default=2.0)
+    parser.add_argument("--instants", type=float, default=0.3)
+    parser.add_argument("--crud-ops", type=int, default=CRUD_OPS)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip the traced run that records peak memory")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "engine": timeline.TIMELINE_ENGINE,
+        "parameters": {key: getattr(args, key) for key in
+                       ("seed", "categories", "countries", "overlap", "links", "instants")},
+        "runs": [bench_size(n, args) for n in args.sizes],
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Time the cold start of the app: importing it and serving the first requests.
+
+Import time is measured in fresh interpreters (``import app`` with every page
+module), together with the slowest modules reported by ``-X importtime``.
+First-response time starts a single gunicorn worker through ``serve.py`` and
+measures how long the first requests take from process start, ending with the
+page-routing ``_dash-update-component`` call for ``/`` that builds the timeline
+layout and its initial figure. Results can be written as JSON and compared
+between commits.
+
+Usage: python benchmarks/bench_startup.py [--repeat 5] [--output startup.json]
+                                          [--compare old.json]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "src"
+# Requested in order once the server answers; the first one waits for startup
+FIRST_PATHS = ("/", "/_dash-layout", "/_dash-dependencies")
+# The Dash pages callback that renders a page into this component
+ROUTING_OUTPUT = "_pages_content.children"
+ROUTING_PATH = "/_dash-update-component"
+IMPORT_SCRIPT = "import time; t = time.perf_counter(); import app; print(time.perf_counter() - t)"
+
+
+def import_seconds(env):
+    """Seconds ``import app`` takes in a fresh interpreter."""
+    out = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], cwd=SRC, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def slowest_imports(env, top):
+    """The ``top`` modules with the largest cumulative import time (seconds)."""
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=SRC,
+                         env=env, capture_output=True, text=True, check=True).stderr
+    modules = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        modules.append((name.strip(), int(cumulative) / 1e6))
+    return sorted(modules, key=lambda m: -m[1])[:top]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def routing_request(dependencies, pathname="/"):
+    """Body of the page-routing callback request that renders ``pathname``."""
+    dep = next(d for d in dependencies if ROUTING_OUTPUT in d["output"])
+    outputs = []
+    for output in dep["output"].strip(".").split("..."):
+        component, prop = output.rsplit(".", 1)
+        outputs.append({"id": component, "property": prop})
+    values = {"pathname": pathname, "search": ""}
+    inputs = [dict(i, value=values.get(i["property"])) for i in dep["inputs"]]
+    return {
+        "output": dep["output"],
+        "outputs": outputs if len(outputs) > 1 else outputs[0],
+        "inputs": inputs,
+        "changedPropIds": [f"{i['id']}.{i['property']}" for i in inputs],
+        "state": [dict(s, value=None) for s in dep["state"]],
+    }
+
+
+def first_responses(env, timeout=60):
+    """Start one worker and return seconds from launch to each of ``FIRST_PATHS``
+    and to the page-routing callback for ``/``."""
+    port = free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, str(SRC / "serve.py"), "--bind", f"127.0.0.1:{port}",
+         "--workers", "1", "--threads", "1"],
+        cwd=SRC, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def fetch(path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(f"http://127.0.0.1:{port}{path}", data=data,
+                                         headers={"Content-Type": "application/json"})
+        while True:
+            try:
+                with urllib.request.urlopen(request, timeout=30) as resp:
+                    return resp.read()
+            except urllib.error.HTTPError:
+                raise
+            except OSError:
+                if proc.poll() is not None or time.perf_counter() - started > timeout:
+                    raise RuntimeError("server did not start")
+                time.sleep(0.02)
+
+    timings = {}
+    try:
+        for path in FIRST_PATHS:
+            body = fetch(path)
+            timings[path] = time.perf_counter() - started
+        fetch(ROUTING_PATH, routing_request(json.loads(body)))
+        timings[ROUTING_PATH] = time.perf_counter() - started
+    finally:
+        proc.terminate()
+        proc.wait()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="timeline-startup-")
+    env = dict(os.environ, EVENTS_DB_FILE=os.path.join(workdir, "events.db"))
+    # Create the database first so every run measures the same work
+    subprocess.run([sys.executable, str(SRC / "db.py"), "--db", env["EVENTS_DB_FILE"]],
+                   cwd=SRC, env=env, check=True, stdout=subprocess.DEVNULL)
+
+    imports = [import_seconds(env) for _ in range(args.repeat)]
+    responses = [first_responses(env) for _ in range(args.repeat)]
+    results = {
+        "import_seconds": statistics.median(imports),
+        "first_response_seconds": {path: statistics.median(r[path] for r in responses)
+                                   for path in FIRST_PATHS + (ROUTING_PATH,)},
+        "slowest_imports": slowest_imports(env, args.top),
+        "repeat": args.repeat,
+    }
+    for name in os.listdir(workdir):
+        os.unlink(os.path.join(workdir, name))
+    os.rmdir(workdir)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+
+    def ratio(new, old):
+        return f"  ({new / old:.2f}x)" if old else ""
+
+    print(f"import app: {1000 * results['import_seconds']:.0f} ms"
+          + ratio(results["import_seconds"], baseline.get("import_seconds")))
+    for path, seconds in results["first_response_seconds"].items():
+        old = baseline.get("first_response_seconds", {}).get(path)
+        print(f"first {path}: {1000 * seconds:.0f} ms after launch" + ratio(seconds, old))
+    print("slowest imports (cumulative):")
+    for name, seconds in results["slowest_imports"]:
+        print(f"  {1000 * seconds:8.1f} ms  {name}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Deterministic synthetic events for benchmarks.
+
+The same arguments always produce the same events, so timings from different
+commits are measured on identical data. Events come out as dicts in the shape
+``db.import_events`` reads, with ``affects`` holding the tags of later events.
+
+Usage: python benchmarks/synthetic.py 100000 events.jsonl [--links 2 --instants 0.3]
+"""
+import argparse
+import json
+import random
+from datetime import date, timedelta
+
+CATEGORIES = ["Politics", "Science", "Culture", "War", "Economy", "Religion", "Technology",
+              "Exploration", "Art", "Sport"]
+TOPICS = ["Conflict", "Treaty", "Discovery", "Invention", "Music", "Trade", "Reform", "Disaster"]
+WORDS = ["treaty", "battle", "discovery", "expedition", "reform", "crisis", "festival",
+         "invention", "revolution", "alliance", "famine", "council", "charter", "voyage"]
+# plotly.express converts dates to pandas' nanosecond timestamps, which only
+# reach back to 1677, so the events stay within three centuries after 1700
+ORIGIN = date(1700, 1, 1)
+SPAN_DAYS = 300 * 365
+
+
+def generate_events(n, seed=0, categories=5, countries=20, overlap=4.0, links=2.0,
+                    instants=0.3):
+    """Yield ``n`` synthetic events.
+
+    ``categories`` and ``countries`` set the number of distinct values (up to
+    ``len(CATEGORIES)`` categories). ``overlap`` is the average number of other
+    events of the same category and country each event overlaps, ``links`` the
+    average number of later events each event affects, and ``instants`` the
+    share of events without an end date. Events are spread evenly over
+    three centuries and yielded one at a time, so any size fits in memory.
+    """
+    rng = random.Random(seed)
+    category_names = CATEGORIES[:max(1, min(categories, len(CATEGORIES)))]
+    country_names = [f"Country{i:03d}" for i in range(max(1, countries))]
+    groups = len(category_names) * len(country_names)
+    # Mean duration that makes each event overlap ``overlap`` others in its group
+    spacing = SPAN_DAYS * groups / max(n, 1)
+    mean_days = max(1.0, overlap * spacing / 2)
+    for i in range(n):
+        start = ORIGIN + timedelta(days=rng.randrange(SPAN_DAYS))
+        end = None
+        if rng.random() >= instants:
+            days = int(rng.expovariate(1 / mean_days))
+            end = min(start + timedelta(days=days), ORIGIN + timedelta(days=SPAN_DAYS))
+        fanout = int(rng.expovariate(1 / links) + 0.5) if links > 0 else 0
+        affects = sorted({f"syn{rng.randrange(i + 1, n)}" for _ in range(fanout) if i + 1 < n})
+        yield {
+            "category": rng.choice(category_names),
+            "topic": rng.choice(TOPICS),
+            "name": f"Event {i}",
+            "country": rng.choice(country_names),
+            "date_start": start.isoformat(),
+            "date_end": end.isoformat() if end else None,
+            "description": " ".join(rng.choices(WORDS, k=8)),
+            "tag": f"syn{i}",
+            "affects": affects,
+        }
+
+
+def write_jsonl(path, n, **options):
+    """Write ``generate_events(n, **options)`` to ``path`` as JSON lines."""
+    with open(path, "w", encoding="utf-8") as fh:
+        for ev in generate_events(n, **options):
+            fh.write(json.dumps(ev) + "\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("count", type=int)
+    parser.add_argument("output")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--categories", type=int, default=5)
+    parser.add_argument("--countries", type=int, default=20)
+    parser.add_argument("--overlap", type=float, default=4.0)
+    parser.add_argument("--links", type=float, default=2.0)
+    parser.add_argument("--instants", type=float, default=0.3)
+    args = parser.parse_args()
+    write_jsonl(args.output, args.count, seed=args.seed, categories=args.categories,
+                countries=args.countries, overlap=args.overlap, links=args.links,
+                instants=args.instants)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,22 @@ import dash
 from dash import Dash, html, dcc
 import dash_mantine_components as dmc
 import db
+import metrics
+
+# Compress responses (brotli, else gzip); serve.py turns this on by default
+COMPRESS = os.environ.get("TIMELINE_COMPRESS", "").lower() in ("1", "true", "yes")
 
 # Initialize Dash app with support for pages
 app = Dash(__name__, use_pages=True, suppress_callback_exceptions=True)
+# WSGI entry point, e.g. ``gunicorn app:server``; see serve.py
+server = app.server
+if COMPRESS:
+    from flask_compress import Compress
+
+    server.config.update(COMPRESS_ALGORITHM=["br", "gzip"], COMPRESS_MIN_SIZE=500)
+    Compress(server)
+# Serves /metrics when TIMELINE_METRICS is set
+metrics.init_app(server)
 
 app.layout = dmc.MantineProvider(
     theme={"colorScheme": "light", "primaryColor": "blue", "fontFamily": "Arial, sans-serif"},
@@ -0,0 +1,168 @@
+// Client-side timeline filtering (enabled with TIMELINE_CLIENT_FILTERING).
+// Renders the figure from the columnar snapshot built by
+// pages/timeline.py:timeline_snapshot(), mirroring the server-side filters.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    timeline: {
+        render: function (snap, categories, countries, nClicks, arrows, matches, start, end) {
+            if (!snap) {
+                return window.dash_clientside.no_update;
+            }
+            // An empty selection means "no events", a missing one means "all"
+            const catSet = categories ? new Set(categories) : null;
+            const countrySet = countries ? new Set(countries) : null;
+            // Tags matching the search box, looked up on the server
+            const matchSet = matches ? new Set(matches) : null;
+            const visible = [];
+            for (let i = 0; i < snap.tag.length; i++) {
+                if (catSet && !catSet.has(snap.categories[snap.category[i]])) continue;
+                if (countrySet && !countrySet.has(snap.countries[snap.country[i]])) continue;
+                if (matchSet && !matchSet.has(snap.tag[i])) continue;
+                const last = snap.end[i] || snap.start[i];
+                if (start && last < start) continue;
+                if (end && snap.start[i] > end) continue;
+                visible.push(i);
+            }
+            if (visible.length === 0) {
+                return {
+                    data: [],
+                    layout: {
+                        annotations: [{
+                            text: "No events to display", xref: "paper", yref: "paper",
+                            x: 0.5, y: 0.5, showarrow: false, font: {size: 16},
+                        }],
+                    },
+                };
+            }
+
+            const rowId = (i) => snap.rows[snap.row[i]];
+            // Same fields and order as _hover_fields() on the server
+            const custom = (i) => [snap.tag[i], snap.name[i], snap.categories[snap.category[i]],
+                snap.topic[i], snap.countries[snap.country[i]], snap.start[i], snap.end[i],
+                snap.description[i]];
+            const hover = snap.hover;
+
+            // Row then start date, the order make_timeline_figure draws events in
+            visible.sort((a, b) => snap.row[a] - snap.row[b] ||
+                (snap.start[a] < snap.start[b] ? -1 : snap.start[a] > snap.start[b] ? 1 : 0));
+
+            // One bar trace, one instant trace and one flag trace per category
+            const byCat = new Map();
+            for (const i of visible) {
+                const c = snap.category[i];
+                if (!byCat.has(c)) {
+                    byCat.set(c, {
+                        bars: {x: [], y: [], customdata: []},
+                        points: {x: [], y: [], customdata: []},
+                        flags: {x: [], y: [], text: []},
+                    });
+                }
+                const group = byCat.get(c);
+                if (snap.end[i]) {
+                    group.bars.x.push(snap.start[i], snap.end[i], null);
+                    group.bars.y.push(rowId(i), rowId(i), null);
+                    group.bars.customdata.push(custom(i), custom(i), null);
+                } else {
+                    group.points.x.push(snap.start[i]);
+                    group.points.y.push(rowId(i));
+                    group.points.customdata.push(custom(i));
+                }
+                const flag = snap.flags[snap.country[i]];
+                if (flag) {
+                    const s = Date.parse(snap.start[i]);
+                    const e = snap.end[i] ? Date.parse(snap.end[i]) : s;
+                    group.flags.x.push(new Date(s + (e - s) / 2).toISOString());
+                    group.flags.y.push(rowId(i));
+                    group.flags.text.push(flag);
+                }
+            }
+            const data = [];
+            // Colours by first appearance, like the server-rendered figure
+            let order = 0;
+            for (const [c, group] of byCat) {
+                const name = snap.categories[c];
+                const colour = snap.palette[order++ % snap.palette.length];
+                if (group.bars.x.length) {
+                    data.push({
+                        type: "scattergl", mode: "lines", name: name, legendgroup: name,
+                        x: group.bars.x, y: group.bars.y, customdata: group.bars.customdata,
+                        line: {color: colour, width: 12, dash: snap.dashes[c]},
+                        hovertemplate: hover,
+                    });
+                }
+                if (group.points.x.length) {
+                    data.push({
+                        type: "scattergl", mode: "markers", name: name + " (instant)",
+                        x: group.points.x, y: group.points.y, customdata: group.points.customdata,
+                        marker: {symbol: "diamond", size: 10, color: colour},
+                        hovertemplate: hover, showlegend: false,
+                    });
+                }
+                if (group.flags.x.length) {
+                    data.push({
+                        type: "scattergl", mode: "text", name: name + " (flags)",
+                        x: group.flags.x, y: group.flags.y, text: group.flags.text,
+                        textposition: "middle center", hoverinfo: "skip", showlegend: false,
+                    });
+                }
+            }
+
+            // Causal links between visible events, never pointing backwards
+            if (arrows && arrows.includes("show")) {
+                const shown = new Set(visible);
+                const h = {x: [], y: []};
+                const v = {x: [], y: []};
+                const heads = {x: [], y: [], symbol: []};
+                for (const [src, tgt] of snap.links) {
+                    if (!shown.has(src) || !shown.has(tgt)) continue;
+                    const sourceEnd = snap.end[src] || snap.start[src];
+                    const targetStart = snap.start[tgt];
+                    const tail = sourceEnd < targetStart ? sourceEnd : targetStart;
+                    if (tail < targetStart) {
+                        h.x.push(tail, targetStart, null);
+                        h.y.push(rowId(src), rowId(src), null);
+                    }
+                    if (snap.row[tgt] !== snap.row[src]) {
+                        v.x.push(targetStart, targetStart, null);
+                        v.y.push(rowId(src), rowId(tgt), null);
+                    }
+                    heads.x.push(targetStart);
+                    heads.y.push(rowId(tgt));
+                    heads.symbol.push(snap.row[tgt] === snap.row[src] ? "triangle-right"
+                        : snap.row[tgt] > snap.row[src] ? "triangle-down" : "triangle-up");
+                }
+                const line = {color: "black", width: 1};
+                for (const seg of [h, v]) {
+                    if (seg.x.length) {
+                        data.push({type: "scatter", mode: "lines", x: seg.x, y: seg.y, line: line,
+                            hoverinfo: "skip", name: "causal links", showlegend: false});
+                    }
+                }
+                if (heads.x.length) {
+                    data.push({type: "scatter", mode: "markers", x: heads.x, y: heads.y,
+                        marker: {symbol: heads.symbol, size: 8, color: "black"},
+                        hoverinfo: "skip", name: "causal links", showlegend: false});
+                }
+            }
+
+            // Only rows that still hold an event, in the server's row order
+            const rowIdx = Array.from(new Set(visible.map((i) => snap.row[i]))).sort((a, b) => a - b);
+            return {
+                data: data,
+                layout: {
+                    yaxis: {
+                        type: "category",
+                        categoryorder: "array",
+                        categoryarray: rowIdx.map((r) => snap.rows[r]),
+                        autorange: "reversed",
+                        tickmode: "array",
+                        tickvals: rowIdx.map((r) => snap.rows[r]),
+                        ticktext: rowIdx.map((r) => snap.row_labels[r]),
+                        title: {text: ""},
+                    },
+                    xaxis: {type: "date", rangeslider: {visible: true}},
+                    margin: {l: 100, r: 20, t: 40, b: 40},
+                },
+            };
+        },
+    },
+});
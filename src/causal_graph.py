@@ -0,0 +1,207 @@
+import numpy as np
+
+# Bytes of reachability bitsets held at once by CausalGraph.descendant_counts
+BITSET_BUDGET = 64 * 1024 * 1024
+
+
+def _csr(n, sources, targets):
+    """Return ``(indptr, indices)`` of the adjacency ``sources -> targets`` over ``n`` nodes."""
+    order = np.argsort(sources, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+    return indptr, targets[order].astype(np.int64)
+
+
+def _expand(indptr, indices, nodes):
+    """Return ``(neighbours, segment)``: every neighbour of ``nodes`` and the
+    position in ``nodes`` it came from, without a Python loop."""
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    segment = np.repeat(np.arange(len(nodes)), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return indices[starts[segment] + offsets], segment
+
+
+class CausalGraph:
+    """Causal links as compressed sparse row (CSR) adjacency arrays.
+
+    Events are numbered by their position in the sorted ``ids`` array;
+    ``indptr``/``indices`` hold the links each event affects and
+    ``rev_indptr``/``rev_indices`` the links it is affected by. Public methods
+    take and return event ids. Links to unknown ids are dropped.
+    """
+
+    def __init__(self, ids, sources, targets):
+        self.ids = np.unique(np.asarray(ids, dtype=np.int64))
+        n = len(self.ids)
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        src = np.searchsorted(self.ids, sources)
+        dst = np.searchsorted(self.ids, targets)
+        known = ((src < n) & (dst < n)
+                 & (self.ids[np.minimum(src, n - 1)] == sources)
+                 & (self.ids[np.minimum(dst, n - 1)] == targets)) if n else np.zeros(len(src), bool)
+        src, dst = src[known], dst[known]
+        self.indptr, self.indices = _csr(n, src, dst)
+        self.rev_indptr, self.rev_indices = _csr(n, dst, src)
+        self._levels = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def link_count(self):
+        return len(self.indices)
+
+    def _position(self, event_id):
+        pos = int(np.searchsorted(self.ids, event_id))
+        if pos >= len(self.ids) or self.ids[pos] != event_id:
+            raise KeyError(event_id)
+        return pos
+
+    def _adjacency(self, direction):
+        if direction == "downstream":
+            return self.indptr, self.indices
+        if direction == "upstream":
+            return self.rev_indptr, self.rev_indices
+        raise ValueError(f"Unsupported direction: {direction}")
+
+    def neighbours(self, event_id, direction="downstream"):
+        """Ids of the events ``event_id`` directly affects (or is affected by)."""
+        indptr, indices = self._adjacency(direction)
+        pos = self._position(event_id)
+        return self.ids[indices[indptr[pos]:indptr[pos + 1]]]
+
+    def bfs(self, event_id, direction="downstream", max_depth=None):
+        """Breadth-first reachability from ``event_id``.
+
+        Returns ``(ids, depths)`` of every reachable event except the start,
+        nearest first. Each level is expanded with array operations.
+        """
+        indptr, indices = self._adjacency(direction)
+        start = self._position(event_id)
+        seen = np.zeros(len(self.ids), dtype=bool)
+        seen[start] = True
+        frontier = np.array([start], dtype=np.int64)
+        found, depths, depth = [], [], 0
+        while len(frontier) and (max_depth is None or depth < max_depth):
+            depth += 1
+            nxt, _ = _expand(indptr, indices, frontier)
+            nxt = np.unique(nxt[~seen[nxt]])
+            seen[nxt] = True
+            found.append(nxt)
+            depths.append(np.full(len(nxt), depth, dtype=np.int64))
+            frontier = nxt
+        if not found:
+            return self.ids[:0], np.empty(0, dtype=np.int64)
+        return self.ids[np.concatenate(found)], np.concatenate(depths)
+
+    def dfs(self, event_id, direction="downstream"):
+        """Ids reachable from ``event_id`` in depth-first preorder (start excluded)."""
+        indptr, indices = self._adjacency(direction)
+        start = self._position(event_id)
+        seen = np.zeros(len(self.ids), dtype=bool)
+        seen[start] = True
+        stack = list(indices[indptr[start]:indptr[start + 1]][::-1])
+        order = []
+        while stack:
+            pos = stack.pop()
+            if seen[pos]:
+                continue
+            seen[pos] = True
+            order.append(pos)
+            stack.extend(indices[indptr[pos]:indptr[pos + 1]][::-1])
+        return self.ids[np.array(order, dtype=np.int64)]
+
+    def reachable(self, event_id, direction="downstream", max_depth=None):
+        """Ids of every event reachable from ``event_id``, nearest first."""
+        return self.bfs(event_id, direction, max_depth)[0]
+
+    def _topological_levels(self):
+        """Kahn's algorithm one level at a time; events on or behind a cycle are left out."""
+        if self._levels is None:
+            indegree = np.diff(self.rev_indptr)
+            frontier = np.flatnonzero(indegree == 0)
+            levels = []
+            while len(frontier):
+                levels.append(frontier)
+                nxt, _ = _expand(self.indptr, self.indices, frontier)
+                indegree = indegree - np.bincount(nxt, minlength=len(self.ids))
+                frontier = np.unique(nxt[indegree[nxt] == 0])
+            self._levels = levels
+        return self._levels
+
+    def has_cycle(self):
+        return sum(len(level) for level in self._topological_levels()) < len(self.ids)
+
+    def topological_order(self):
+        """Ids ordered so every event comes before the events it affects.
+
+        Raises ``ValueError`` when the links contain a cycle.
+        """
+        if self.has_cycle():
+            raise ValueError("The causal links contain a cycle: " + str(self.find_cycle()))
+        levels = self._topological_levels()
+        return self.ids[np.concatenate(levels)] if levels else self.ids[:0]
+
+    def find_cycle(self):
+        """Return the ids of one cycle in link order, or ``[]`` for an acyclic graph.
+
+        Every event left over by Kahn's algorithm has a predecessor that was
+        also left over, so walking predecessors among them must hit a cycle.
+        """
+        ordered = np.zeros(len(self.ids), dtype=bool)
+        for level in self._topological_levels():
+            ordered[level] = True
+        leftover = np.flatnonzero(~ordered)
+        if not len(leftover):
+            return []
+        pos, walk, index = int(leftover[0]), [], {}
+        while pos not in index:
+            index[pos] = len(walk)
+            walk.append(pos)
+            preds = self.rev_indices[self.rev_indptr[pos]:self.rev_indptr[pos + 1]]
+            pos = int(preds[~ordered[preds]][0])
+        cycle = walk[index[pos]:][::-1]
+        return [int(self.ids[p]) for p in cycle]
+
+    def descendant_counts(self):
+        """Number of events transitively affected by each event, aligned with ``ids``.
+
+        On acyclic graphs the counts come from reachability bitsets pushed
+        backwards through the topological levels, a block of target columns
+        at a time to stay within ``BITSET_BUDGET``. Graphs with cycles fall
+        back to one breadth-first search per event.
+        """
+        n = len(self.ids)
+        if self.has_cycle():
+            return np.array([len(self.reachable(event_id)) for event_id in self.ids],
+                            dtype=np.int64)
+        counts = np.zeros(n, dtype=np.int64)
+        levels = self._topological_levels()[::-1]  # sinks first
+        words = max(1, min((n + 63) // 64, BITSET_BUDGET // max(n * 8 * 9, 1)))
+        block = words * 64
+        for first in range(0, n, block):
+            bits = np.zeros((n, words), dtype=np.uint64)
+            for level in levels:
+                children, segment = _expand(self.indptr, self.indices, level)
+                if not len(children):
+                    continue
+                child_bits = bits[children]
+                offset = children - first
+                inside = np.flatnonzero((offset >= 0) & (offset < block))
+                child_bits[inside, offset[inside] // 64] |= (
+                    np.uint64(1) << (offset[inside] % 64).astype(np.uint64))
+                starts = np.flatnonzero(np.r_[True, segment[1:] != segment[:-1]])
+                bits[level[segment[starts]]] = np.bitwise_or.reduceat(child_bits, starts, axis=0)
+            counts += np.unpackbits(bits.view(np.uint8), axis=1).sum(axis=1, dtype=np.int64)
+        return counts
+
+    def top_influential(self, k=10):
+        """The ``k`` events with the most descendants as ``(id, count)`` pairs."""
+        counts = self.descendant_counts()
+        order = np.argsort(-counts, kind="stable")[:k]
+        return [(int(self.ids[i]), int(counts[i])) for i in order]
@@ -1,222 +1,1453 @@
 import os
+import re
+import csv
+import json
+import time
+import atexit
+import logging
 import sqlite3
+import threading
+from collections import deque
+from datetime import datetime
 from pathlib import Path
 import argparse
+import metrics
+from intervals import IntervalIndex
+from name_index import NameIndex
 
 # Default path for the SQLite database
 DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / "database" / "events.db"
 # Allow overriding the database location via environment variable
 DB_FILE = os.environ.get("EVENTS_DB_FILE", str(DEFAULT_DB_PATH))
+# Connection tuning; cache size follows SQLite's convention (negative = KiB)
+DB_MMAP_SIZE = int(os.environ.get("EVENTS_DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+DB_CACHE_SIZE = int(os.environ.get("EVENTS_DB_CACHE_SIZE", "-65536"))
+# Number of idle connections kept for reuse after their worker thread exits
+DB_POOL_SIZE = int(os.environ.get("EVENTS_DB_POOL_SIZE", "8"))
+# How long (ms) a write waits for another process's write lock before failing
+DB_BUSY_TIMEOUT_MS = int(os.environ.get("EVENTS_DB_BUSY_TIMEOUT_MS", "5000"))
+# Approximate memory cap for the in-process event cache (0 disables it)
+EVENT_CACHE_MAX_BYTES = int(os.environ.get("EVENTS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# bm25 weights of the full-text columns (name, topic, description)
+FTS_WEIGHTS = (10.0, 5.0, 1.0)
+# Statements slower than this (ms) are logged with their query plan (0 disables)
+SLOW_QUERY_MS = float(os.environ.get("EVENTS_DB_SLOW_QUERY_MS", "0"))
+
+logger = logging.getLogger(__name__)
+# Most recent slow statements, newest last
+_slow_queries = deque(maxlen=100)
+
+
+def explain(conn, sql, params=()):
+    """Return the ``EXPLAIN QUERY PLAN`` detail lines of ``sql``."""
+    try:
+        # A plain cursor, so explaining is never traced itself
+        cur = conn.cursor(sqlite3.Cursor)
+        rows = cur.execute("EXPLAIN QUERY PLAN " + sql, params or ()).fetchall()
+    except sqlite3.Error as exc:
+        return [f"(no plan: {exc})"]
+    return [row[3] for row in rows]
+
+def slow_queries():
+    """Return the recently logged slow statements, oldest first."""
+    return list(_slow_queries)
+
+
+class TracingCursor(sqlite3.Cursor):
+    """Cursor that times each statement, including fetching its rows.
+
+    Once a statement has taken ``SLOW_QUERY_MS`` it is logged once, with its
+    parameters and query plan, and kept in :func:`slow_queries`.
+    """
+
+    def execute(self, sql, parameters=()):
+        self._start_statement(sql, parameters)
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._start_statement(sql, None)
+        return self._timed(super().executemany, sql, seq_of_parameters)
+
+    def fetchone(self):
+        return self._timed(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self._timed(super().fetchall)
+
+    def _start_statement(self, sql, parameters):
+        self._sql, self._params = sql, parameters
+        self._elapsed, self._logged = 0.0, False
+
+    def _timed(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._elapsed += time.perf_counter() - start
+            if not self._logged and self._elapsed * 1000 >= SLOW_QUERY_MS:
+                self._logged = True
+                self._log_slow()
+
+    def _log_slow(self):
+        params = self._params
+        if params is not None and not isinstance(params, dict):
+            params = list(params)
+        plan = explain(self.connection, self._sql, params) if params is not None else []
+        entry = {"sql": " ".join(self._sql.split()), "params": params,
+                 "ms": self._elapsed * 1000, "plan": plan}
+        _slow_queries.append(entry)
+        logger.warning("Slow query (%.1f ms): %s params=%r\n  %s",
+                       entry["ms"], entry["sql"], params, "\n  ".join(plan))
+
+
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection owned by a :class:`ConnectionPool`.
+
+    ``close()`` hands the connection back instead of closing it. Nested
+    ``connect_db()`` calls on the same thread share the connection; once the
+    outermost user closes it, any uncommitted work is rolled back. Used as a
+    context manager, it rolls back when the block raises and is always
+    released on exit.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.path = None
+        self.depth = 0
+        # PRAGMA data_version when last checked
+        self.seen_data_version = None
+
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = TracingCursor if SLOW_QUERY_MS > 0 else sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        # Connection.execute does not go through cursor(), so route it there
+        if SLOW_QUERY_MS > 0:
+            return self.cursor().execute(sql, parameters)
+        return super().execute(sql, parameters)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Unlike sqlite3's own context manager this never commits: a failed
+        # write is rolled back and the connection always goes back to the pool
+        if exc_type is not None and self.in_transaction:
+            self.rollback()
+        self.close()
+        return False
+
+    def close(self):
+        self.depth = max(self.depth - 1, 0)
+        if self.depth == 0 and self.in_transaction:
+            self.rollback()
+
+    def dispose(self):
+        """Really close the underlying SQLite handle."""
+        super().close()
+
+
+class ConnectionPool:
+    """Thread-safe pool handing out one reusable connection per worker thread.
+
+    Connections of threads that have exited are reclaimed and reused by new
+    threads, so short-lived request threads do not pay the setup cost again.
+    """
+
+    def __init__(self, max_idle=DB_POOL_SIZE):
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._owners = {}  # thread -> connection
+        self._idle = []
+
+    def _open(self, path):
+        conn = sqlite3.connect(path, factory=PooledConnection, check_same_thread=False)
+        conn.path = path
+        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT_MS)}")
+        conn.execute(f"PRAGMA mmap_size={int(DB_MMAP_SIZE)}")
+        conn.execute(f"PRAGMA cache_size={int(DB_CACHE_SIZE)}")
+        # Baseline for spotting writes by other connections in data_version()
+        conn.seen_data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        return conn
+
+    def _reclaim(self):
+        """Move connections of finished threads to the idle list (lock held)."""
+        for thread in [t for t in self._owners if not t.is_alive()]:
+            conn = self._owners.pop(thread)
+            if conn.in_transaction:
+                conn.rollback()
+            conn.depth = 0
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+            else:
+                conn.dispose()
+
+    def connection(self, path):
+        """Return the calling thread's connection to ``path``."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or conn.path != path:
+            thread = threading.current_thread()
+            with self._lock:
+                self._reclaim()
+                if conn is not None:
+                    self._owners.pop(thread, None)
+                    conn.dispose()
+                conn = next((c for c in self._idle if c.path == path), None)
+                if conn is not None:
+                    self._idle.remove(conn)
+                else:
+                    conn = self._open(path)
+                self._owners[thread] = conn
+            self._local.conn = conn
+        conn.depth += 1
+        return conn
+
+    def forget(self):
+        """Drop every connection without closing it.
+
+        Used in a forked child: SQLite handles must not be used, or even
+        closed, in a process other than the one that opened them.
+        """
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._owners = {}
+        self._idle = []
+
+    def close(self):
+        """Close every pooled connection; the pool stays usable afterwards."""
+        with self._lock:
+            conns = list(self._owners.values()) + self._idle
+            self._owners.clear()
+            self._idle.clear()
+            self._local = threading.local()
+        for conn in conns:
+            conn.dispose()
+
+
+_pool = ConnectionPool()
+atexit.register(_pool.close)
+# Worker processes forked from a preloaded server open their own connections
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=lambda: _pool.forget())
 
 def connect_db():
-    """Connect to the SQLite database and return a connection."""
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row  # Return rows as dictionaries
-    return conn
+    """Return this thread's pooled connection to the SQLite database.
 
-def init_db():
-    """Create the events table and insert seed data if the database is empty."""
-    conn = connect_db()
-    cur = conn.cursor()
-    # Create events table with necessary fields
+    Use it as ``with connect_db() as conn:``; leaving the block releases it
+    to the pool and rolls back uncommitted work if the block raised.
+    """
+    return _pool.connection(DB_FILE)
+
+def close_pool():
+    """Shut down the connection pool, closing all open connections."""
+    _pool.close()
+
+
+# Bumped by every write made through this module
+_version_lock = threading.Lock()
+_local_version = 0
+# Bumped when a connection notices a write made by another connection
+_external_version = 0
+
+def _bump_version():
+    global _local_version
+    with _version_lock:
+        _local_version += 1
+
+def data_version():
+    """Return a token that changes whenever the events data may have changed.
+
+    Writes made through this module bump a local counter. Every change of a
+    connection's ``PRAGMA data_version`` bumps a second counter: it reports
+    commits by any other connection, this process's own included, and cannot
+    tell them apart, so an in-process write may cost other threads one extra
+    cache miss but a write from another process is never missed. New
+    connections start from a baseline and do not count as a change.
+    """
+    global _external_version
+    with connect_db() as conn:
+        current = conn.execute("PRAGMA data_version").fetchone()[0]
+    if conn.seen_data_version != current:
+        conn.seen_data_version = current
+        with _version_lock:
+            _external_version += 1
+    return (DB_FILE, _local_version, _external_version)
+
+
+class EventCache:
+    """Holds the decoded event list for a single data version."""
+
+    def __init__(self, max_bytes=EVENT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._version = None
+        self._events = None
+        self._rejected = None  # last version found too large to keep
+
+    @staticmethod
+    def estimate_size(events):
+        """Rough memory footprint of ``events`` in bytes."""
+        text = sum(len(v) for ev in events for v in ev.values() if isinstance(v, str))
+        return text + 400 * len(events)
+
+    def get(self, version):
+        with self._lock:
+            return self._events if self._version == version else None
+
+    def rejected(self, version):
+        """Whether the events of ``version`` were too large to keep."""
+        with self._lock:
+            return self._rejected == version
+
+    def put(self, version, events):
+        rejected = None
+        if self.estimate_size(events) > self.max_bytes:
+            events, version, rejected = None, None, version  # too large to keep around
+        with self._lock:
+            self._version = version
+            self._events = events
+            self._rejected = rejected
+
+    def clear(self):
+        with self._lock:
+            self._version = None
+            self._events = None
+            self._rejected = None
+
+
+_event_cache = EventCache()
+# Indexes derived from the cached events: name -> (data version, index)
+_derived_lock = threading.Lock()
+_derived_indexes = {}
+
+# Values bound per ``IN (...)`` list, well below SQLite's parameter limit
+IN_CHUNK_SIZE = 500
+
+# Link fields exposed on event dicts, mapped to (own column, other column) in
+# the ``event_links`` table. ``affects`` means "this event is the source".
+LINK_FIELDS = {
+    "affects": ("source_id", "target_id"),
+    "affected_by": ("target_id", "source_id"),
+}
+
+# Columns selected for every event, with the causal links folded back into
+# comma-separated tag strings so callers keep seeing the familiar shape.
+EVENT_SELECT = """
+    SELECT e.id, e.category, e.topic, e.name, e.country, e.date_start, e.date_end,
+           e.description, e.tag,
+           COALESCE((SELECT group_concat(s.tag) FROM event_links l
+                     JOIN events s ON s.id = l.source_id
+                     WHERE l.target_id = e.id), '') AS affected_by,
+           COALESCE((SELECT group_concat(t.tag) FROM event_links l
+                     JOIN events t ON t.id = l.target_id
+                     WHERE l.source_id = e.id), '') AS affects
+    FROM events e
+"""
+
+def make_tag(category, topic, name, date_start):
+    """Build the unique ``Category_Topic_Name_Year`` tag for an event."""
+    year = date_start[:4] if date_start else ""
+    parts = (category, topic, name)
+    tag_cat, tag_topic, tag_name = (p.strip().replace(" ", "_").replace(",", "_") for p in parts)
+    return f"{tag_cat}_{tag_topic}_{tag_name}_{year}"
+
+def split_tags(value):
+    """Normalise a comma-separated string or an iterable of tags into a list."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [t.strip() for t in value if t and t.strip()]
+
+def _link_tags(cur, event_id, field, tags):
+    """Link ``event_id`` to every existing event in ``tags`` through ``field``.
+
+    Unknown tags are ignored and duplicate links are skipped by the primary key.
+    """
+    own, other = LINK_FIELDS[field]
+    for tag in split_tags(tags):
+        cur.execute(
+            f"""
+            INSERT OR IGNORE INTO event_links ({own}, {other})
+            SELECT ?, id FROM events WHERE tag = ? AND id != ?
+            """,
+            (event_id, tag, event_id),
+        )
+
+def _migrate_links(cur):
+    """Move legacy comma-separated ``affects``/``affected_by`` columns into ``event_links``."""
+    columns = {row["name"] for row in cur.execute("PRAGMA table_info(events)")}
+    if "affects" not in columns and "affected_by" not in columns:
+        return
+    cur.execute("SELECT id, affected_by, affects FROM events")
+    for row in cur.fetchall():
+        _link_tags(cur, row["id"], "affected_by", row["affected_by"])
+        _link_tags(cur, row["id"], "affects", row["affects"])
+    cur.execute("ALTER TABLE events DROP COLUMN affected_by")
+    cur.execute("ALTER TABLE events DROP COLUMN affects")
+
+def _create_fts(cur):
+    """Create the ``events_fts`` full-text index and the triggers that keep it in sync.
+
+    The index is external-content (it stores no copy of the text); it is
+    filled from ``events`` the first time it is created.
+    """
+    cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'events_fts'")
+    if cur.fetchone():
+        return
     cur.execute("""
-        CREATE TABLE IF NOT EXISTS events (
-            id INTEGER PRIMARY KEY,
-            category TEXT,
-            topic TEXT,
-            name TEXT,
-            country TEXT,
-            date_start TEXT,
-            date_end TEXT,
-            description TEXT,
-            tag TEXT UNIQUE,
-            affected_by TEXT,
-            affects TEXT
+        CREATE VIRTUAL TABLE events_fts USING fts5(
+            name, topic, description, content='events', content_rowid='id'
         )
     """)
-    conn.commit()
-    # Check if table is empty; if so, insert seed events
-    cur.execute("SELECT COUNT(*) FROM events")
-    count = cur.fetchone()[0]
-    if count == 0:
-        seed_events = [
-            {
-                "category": "Politics", "topic": "War", "name": "World War I", "country": "Global",
-                "date_start": "1914-07-28", "date_end": "1918-11-11",
-                "description": "A global war originating in Europe.",
-                "tag": "Politics_War_World_War_I_1914",
-                "affected_by": "",
-                "affects": "Politics_War_World_War_II_1939"
-            },
-            {
-                "category": "Politics", "topic": "War", "name": "World War II", "country": "Global",
-                "date_start": "1939-09-01", "date_end": "1945-09-02",
-                "description": "Global war involving most world nations.",
-                "tag": "Politics_War_World_War_II_1939",
-                "affected_by": "Politics_War_World_War_I_1914",
-                "affects": "Politics_Conflict_Cold_War_1947,Science_Space_Moon_Landing_1969"
-            },
-            {
-                "category": "Politics", "topic": "Conflict", "name": "Cold War", "country": "Global",
-                "date_start": "1947-03-12", "date_end": "1991-12-26",
-                "description": "Geopolitical tension post-WWII between Eastern and Western blocs.",
-                "tag": "Politics_Conflict_Cold_War_1947",
-                "affected_by": "Politics_War_World_War_II_1939",
-                "affects": "Politics_Conflict_Fall_of_Berlin_Wall_1989"
-            },
-            {
-                "category": "Politics", "topic": "Conflict", "name": "Fall of Berlin Wall", "country": "Germany",
-                "date_start": "1989-11-09", "date_end": None,
-                "description": "Demolition of the Berlin Wall, ending East/West German separation.",
-                "tag": "Politics_Conflict_Fall_of_Berlin_Wall_1989",
-                "affected_by": "Politics_Conflict_Cold_War_1947",
-                "affects": ""
-            },
-            {
-                "category": "Science", "topic": "Space", "name": "Moon Landing", "country": "USA",
-                "date_start": "1969-07-20", "date_end": None,
-                "description": "Apollo 11 mission lands the first humans on the Moon.",
-                "tag": "Science_Space_Moon_Landing_1969",
-                "affected_by": "Politics_War_World_War_II_1939",
-                "affects": ""
-            },
-            {
-                "category": "Culture", "topic": "Music", "name": "Woodstock Festival", "country": "USA",
-                "date_start": "1969-08-15", "date_end": "1969-08-18",
-                "description": "Iconic music festival of 1969.",
-                "tag": "Culture_Music_Woodstock_Festival_1969",
-                "affected_by": "",
-                "affects": ""
-            }
-        ]
-        for ev in seed_events:
-            cur.execute("""
-                INSERT INTO events 
-                (category, topic, name, country, date_start, date_end, description, tag, affected_by, affects)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                ev["category"], ev["topic"], ev["name"], ev["country"],
-                ev["date_start"], ev["date_end"], ev["description"], ev["tag"],
-                ev["affected_by"], ev["affects"]
-            ))
+    cur.execute("""
+        CREATE TRIGGER events_fts_insert AFTER INSERT ON events BEGIN
+            INSERT INTO events_fts (rowid, name, topic, description)
+            VALUES (new.id, new.name, new.topic, new.description);
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER events_fts_delete AFTER DELETE ON events BEGIN
+            INSERT INTO events_fts (events_fts, rowid, name, topic, description)
+            VALUES ('delete', old.id, old.name, old.topic, old.description);
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER events_fts_update AFTER UPDATE OF name, topic, description ON events BEGIN
+            INSERT INTO events_fts (events_fts, rowid, name, topic, description)
+            VALUES ('delete', old.id, old.name, old.topic, old.description);
+            INSERT INTO events_fts (rowid, name, topic, description)
+            VALUES (new.id, new.name, new.topic, new.description);
+        END
+    """)
+    cur.execute("INSERT INTO events_fts (events_fts) VALUES ('rebuild')")
+
+def init_db():
+    """Create the events table and insert seed data if the database is empty."""
+    with connect_db() as conn:
+        cur = conn.cursor()
+        # Create events table with necessary fields
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY,
+                category TEXT,
+                topic TEXT,
+                name TEXT,
+                country TEXT,
+                date_start TEXT,
+                date_end TEXT,
+                description TEXT,
+                tag TEXT UNIQUE
+            )
+        """)
+        # Causal links: one row per "source affects target" pair, indexed both ways
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS event_links (
+                source_id INTEGER NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+                target_id INTEGER NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+                PRIMARY KEY (source_id, target_id)
+            ) WITHOUT ROWID
+        """)
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_event_links_target ON event_links (target_id, source_id)"
+        )
+        _migrate_links(cur)
+        # Composite index for the timeline filters plus one on the effective end date
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_events_category_country_start"
+            " ON events (category, country, date_start)"
+        )
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_events_last_date"
+            " ON events (COALESCE(date_end, date_start))"
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_events_start ON events (date_start)")
+        # Facet lookups (SELECT DISTINCT) walk these instead of the table
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_events_topic ON events (topic)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_events_country ON events (country)")
+        _create_fts(cur)
         conn.commit()
-    conn.close()
+        # Check if table is empty; if so, insert seed events
+        cur.execute("SELECT COUNT(*) FROM events")
+        count = cur.fetchone()[0]
+        if count == 0:
+            seed_events = [
+                {
+                    "category": "Politics", "topic": "War", "name": "World War I", "country": "Global",
+                    "date_start": "1914-07-28", "date_end": "1918-11-11",
+                    "description": "A global war originating in Europe.",
+                    "tag": "Politics_War_World_War_I_1914",
+                    "affected_by": "",
+                    "affects": "Politics_War_World_War_II_1939"
+                },
+                {
+                    "category": "Politics", "topic": "War", "name": "World War II", "country": "Global",
+                    "date_start": "1939-09-01", "date_end": "1945-09-02",
+                    "description": "Global war involving most world nations.",
+                    "tag": "Politics_War_World_War_II_1939",
+                    "affected_by": "Politics_War_World_War_I_1914",
+                    "affects": "Politics_Conflict_Cold_War_1947,Science_Space_Moon_Landing_1969"
+                },
+                {
+                    "category": "Politics", "topic": "Conflict", "name": "Cold War", "country": "Global",
+                    "date_start": "1947-03-12", "date_end": "1991-12-26",
+                    "description": "Geopolitical tension post-WWII between Eastern and Western blocs.",
+                    "tag": "Politics_Conflict_Cold_War_1947",
+                    "affected_by": "Politics_War_World_War_II_1939",
+                    "affects": "Politics_Conflict_Fall_of_Berlin_Wall_1989"
+                },
+                {
+                    "category": "Politics", "topic": "Conflict", "name": "Fall of Berlin Wall", "country": "Germany",
+                    "date_start": "1989-11-09", "date_end": None,
+                    "description": "Demolition of the Berlin Wall, ending East/West German separation.",
+                    "tag": "Politics_Conflict_Fall_of_Berlin_Wall_1989",
+                    "affected_by": "Politics_Conflict_Cold_War_1947",
+                    "affects": ""
+                },
+                {
+                    "category": "Science", "topic": "Space", "name": "Moon Landing", "country": "USA",
+                    "date_start": "1969-07-20", "date_end": None,
+                    "description": "Apollo 11 mission lands the first humans on the Moon.",
+                    "tag": "Science_Space_Moon_Landing_1969",
+                    "affected_by": "Politics_War_World_War_II_1939",
+                    "affects": ""
+                },
+                {
+                    "category": "Culture", "topic": "Music", "name": "Woodstock Festival", "country": "USA",
+                    "date_start": "1969-08-15", "date_end": "1969-08-18",
+                    "description": "Iconic music festival of 1969.",
+                    "tag": "Culture_Music_Woodstock_Festival_1969",
+                    "affected_by": "",
+                    "affects": ""
+                }
+            ]
+            ids = {}
+            for ev in seed_events:
+                cur.execute("""
+                    INSERT INTO events
+                    (category, topic, name, country, date_start, date_end, description, tag)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    ev["category"], ev["topic"], ev["name"], ev["country"],
+                    ev["date_start"], ev["date_end"], ev["description"], ev["tag"],
+                ))
+                ids[ev["tag"]] = cur.lastrowid
+            # Links can only be resolved once every seed event has an id
+            for ev in seed_events:
+                _link_tags(cur, ids[ev["tag"]], "affects", ev["affects"])
+            conn.commit()
+    _bump_version()
+
+def _cached_events(version):
+    """Return the shared (do-not-modify) event list for ``version``."""
+    events = _event_cache.get(version)
+    if events is None:
+        with connect_db() as conn:
+            cur = conn.cursor()
+            cur.execute(EVENT_SELECT)
+            rows = cur.fetchall()
+            events = [dict(row) for row in rows]
+        _event_cache.put(version, events)
+    return events
 
 def get_events():
-    """Retrieve all events from the database as a list of dictionaries."""
-    conn = connect_db()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM events")
-    rows = cur.fetchall()
-    events = [dict(row) for row in rows]
-    conn.close()
+    """Retrieve all events from the database as a list of dictionaries.
+
+    The decoded rows are cached per data version; callers get their own
+    copies and may modify them freely.
+    """
+    return [dict(ev) for ev in _cached_events(data_version())]
+
+def _derived_index(name, build, holds_events=False, from_events=True):
+    """Return the ``name`` index over all events, rebuilt once per data version.
+
+    ``build`` receives the cached event dicts, or nothing when ``from_events``
+    is false and it reads what it needs itself. Indexes that keep references
+    to the event dicts (``holds_events``) are only retained while the event
+    cache holds the same dicts, so they never keep more than
+    ``EVENT_CACHE_MAX_BYTES`` of events alive.
+    """
+    version = data_version()
+    with _derived_lock:
+        cached = _derived_indexes.get(name)
+        if cached is None or cached[0] != version:
+            cached = (version, build(_cached_events(version)) if from_events else build())
+            if holds_events and _event_cache.rejected(version):
+                _derived_indexes.pop(name, None)
+                return cached[1]
+            _derived_indexes[name] = cached
+        return cached[1]
+
+def get_interval_index():
+    """Return the :class:`IntervalIndex` over all events, rebuilt once per data version."""
+    return _derived_index("intervals", IntervalIndex, holds_events=True)
+
+def get_name_index():
+    """Return the :class:`NameIndex` over event names and tags."""
+    return _derived_index("names", NameIndex)
+
+def get_causal_graph():
+    """Return the :class:`causal_graph.CausalGraph` over all links, rebuilt once per data version."""
+    # NumPy is only loaded once a graph is needed
+    from causal_graph import CausalGraph
+
+    def build():
+        # Only ids and links are needed, so the event rows are never decoded
+        with connect_db() as conn:
+            ids = [row[0] for row in conn.execute("SELECT id FROM events")]
+            links = conn.execute("SELECT source_id, target_id FROM event_links").fetchall()
+        return CausalGraph(ids, [row[0] for row in links], [row[1] for row in links])
+
+    return _derived_index("causal_graph", build, from_events=False)
+
+def reachable_tags(tag, direction="downstream", max_depth=None):
+    """Tags of every event reachable from ``tag`` through causal links, nearest first."""
+    found = get_event_labels([tag])
+    if not found:
+        return []
+    ids = get_causal_graph().reachable(found[0]["id"], direction, max_depth).tolist()
+    return [ev["tag"] for ev in get_event_labels(ids, key="id")]
+
+def events_overlapping(start=None, end=None):
+    """Return copies of all events whose date range overlaps ``[start, end]``."""
+    return [dict(ev) for ev in get_interval_index().overlapping(start, end)]
+
+def match_events(text, limit):
+    """Return ``id``/``tag``/``name`` of up to ``limit`` events whose name or
+    tag starts with ``text``, topped up with full-text matches on the name,
+    topic and description."""
+    found = [{"id": ev["id"], "tag": ev["tag"], "name": ev["name"]}
+             for ev in get_name_index().search(text, limit)]
+    match = fts_query(text)
+    if match is None or len(found) >= limit:
+        return found
+    weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+    seen = {ev["id"] for ev in found}
+    with connect_db() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT e.id, e.tag, e.name FROM events_fts JOIN events e ON e.id = events_fts.rowid"
+            f" WHERE events_fts MATCH ? ORDER BY bm25(events_fts, {weights}) LIMIT ?",
+            (match, limit + len(found)),
+        )
+        for row in cur.fetchall():
+            if row["id"] not in seen and len(found) < limit:
+                found.append(dict(row))
+    return found
+
+def get_event_labels(values, key="tag"):
+    """Return ``id``/``tag``/``name`` for the events whose ``key`` is in ``values``."""
+    if key not in ("id", "tag"):
+        raise ValueError(f"Unsupported key: {key}")
+    values = list(values or [])
+    if not values:
+        return []
+    with connect_db() as conn:
+        cur = conn.cursor()
+        found = {}
+        for i in range(0, len(values), IN_CHUNK_SIZE):
+            chunk = values[i:i + IN_CHUNK_SIZE]
+            cur.execute(
+                f"SELECT id, tag, name FROM events WHERE {key} IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            found.update((row[key], dict(row)) for row in cur.fetchall())
+    return [found[v] for v in values if v in found]
+
+def fts_query(text):
+    """Turn free text into an FTS5 query matching every word as a prefix.
+
+    Returns ``None`` when ``text`` holds no searchable words. Quoting each word
+    keeps FTS5 operators and punctuation in user input from being parsed.
+    """
+    words = re.findall(r"\w+", text or "")
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+def search_events(query, limit=50):
+    """Return up to ``limit`` events whose name, topic or description match ``query``.
+
+    Every word must match (as a prefix); results are ranked by bm25 with name
+    matches weighted above topic and description matches.
+    """
+    match = fts_query(query)
+    if match is None:
+        return []
+    weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+    with connect_db() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            EVENT_SELECT
+            + " JOIN events_fts ON events_fts.rowid = e.id WHERE events_fts MATCH ?"
+            f" ORDER BY bm25(events_fts, {weights}) LIMIT ?",
+            (match, limit),
+        )
+        events = [dict(row) for row in cur.fetchall()]
+    return events
+
+def filter_clause(categories=None, countries=None, start=None, end=None, search=None):
+    """Build a ``WHERE`` clause and parameters for the timeline filters.
+
+    ``None`` disables a filter. Dates are ISO strings; an event is kept when
+    ``[date_start, date_end or date_start]`` overlaps ``[start, end]``.
+    ``search`` is free text matched through the ``events_fts`` index.
+    """
+    conditions, params = [], []
+    match = fts_query(search)
+    if match:
+        conditions.append("e.id IN (SELECT rowid FROM events_fts WHERE events_fts MATCH ?)")
+        params.append(match)
+    if categories:
+        conditions.append(f"e.category IN ({','.join('?' * len(categories))})")
+        params.extend(categories)
+    if countries:
+        conditions.append(f"e.country IN ({','.join('?' * len(countries))})")
+        params.extend(countries)
+    if start:
+        conditions.append("COALESCE(e.date_end, e.date_start) >= ?")
+        params.append(start)
+    if end:
+        conditions.append("e.date_start <= ?")
+        params.append(end)
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    return where, params
+
+def query_events(categories=None, countries=None, start=None, end=None, search=None):
+    """Return the events matching the timeline filters.
+
+    Date windows are answered by the interval index, everything else by
+    SQLite. Mirrors ``timeline.filter_events``: an empty category or country list
+    matches nothing, ``None`` matches everything.
+    """
+    if categories is not None and len(categories) == 0:
+        return []
+    if countries is not None and len(countries) == 0:
+        return []
+    if (start or end) and not fts_query(search):
+        events = _query_window(categories, countries, start, end)
+        if events is not None:
+            return events
+    where, params = filter_clause(categories, countries, start, end, search)
+    with connect_db() as conn:
+        cur = conn.cursor()
+        cur.execute(EVENT_SELECT + where, params)
+        events = [dict(row) for row in cur.fetchall()]
     return events
 
+def _query_window(categories, countries, start, end):
+    """Answer a date-window query from the interval index, or return ``None``.
+
+    A B-tree index can bound only one side of an overlap test, so once the
+    :class:`IntervalIndex` for the current data version is built the window
+    is looked up there and the category and country filters run over the
+    events in it. Until then the indexed SQL path answers and the index is
+    built in the background, so no request waits for the whole table to be
+    decoded after a write.
+    """
+    version = data_version()
+    cached = _derived_indexes.get("intervals")
+    if cached is None or cached[0] != version:
+        _warm_interval_index(version)
+        return None
+    categories = set(categories) if categories else None
+    countries = set(countries) if countries else None
+    found = [dict(ev) for ev in cached[1].overlapping(start, end)
+             if (categories is None or ev["category"] in categories)
+             and (countries is None or ev["country"] in countries)]
+    found.sort(key=lambda ev: ev["id"])
+    return found
+
+def _database_bytes():
+    """Size of the database file, read from its header rather than its rows."""
+    with connect_db() as conn:
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return pages * page_size
+
+# Held while a background thread builds the interval index
+_warming = threading.Lock()
+_warm_thread = None
+
+def _warm_interval_index(version):
+    """Build the interval index for ``version`` in a background thread.
+
+    Skipped while another build runs, and for databases whose file is
+    already larger than the event cache, which could not keep the events
+    the index refers to.
+    """
+    global _warm_thread
+    if _event_cache.rejected(version) or _database_bytes() > _event_cache.max_bytes:
+        return
+    if not _warming.acquire(blocking=False):
+        return
+
+    def build():
+        try:
+            get_interval_index()  # for whatever version is current by now
+        finally:
+            _warming.release()
+
+    _warm_thread = threading.Thread(target=build, name="interval-index", daemon=True)
+    _warm_thread.start()
+
+def count_events(categories=None, countries=None, start=None, end=None, search=None):
+    """Count the events matching the timeline filters without loading them."""
+    if categories is not None and len(categories) == 0:
+        return 0
+    if countries is not None and len(countries) == 0:
+        return 0
+    where, params = filter_clause(categories, countries, start, end, search)
+    with connect_db() as conn:
+        count = conn.execute("SELECT COUNT(*) FROM events e" + where, params).fetchone()[0]
+    return count
+
+def date_bounds(categories=None, countries=None, search=None):
+    """Return the earliest start and latest end date of the matching events."""
+    where, params = filter_clause(categories or None, countries or None, search=search)
+    with connect_db() as conn:
+        row = conn.execute(
+            "SELECT MIN(e.date_start), MAX(COALESCE(e.date_end, e.date_start)) FROM events e" + where,
+            params,
+        ).fetchone()
+    return row[0], row[1]
+
+def event_density(categories, countries, start, end, bins, search=None):
+    """Count matching events per ``(category, country)`` and time bin.
+
+    ``[start, end]`` is split into ``bins`` equal bins and each event is counted
+    in the bin holding its start, clamped to the window. Returns a list of
+    ``(category, country, bin, count)`` tuples.
+    """
+    if categories is not None and len(categories) == 0:
+        return []
+    if countries is not None and len(countries) == 0:
+        return []
+    where, params = filter_clause(categories, countries, start, end, search)
+    with connect_db() as conn:
+        cur = conn.cursor()
+        j_start = cur.execute("SELECT julianday(?)", (start,)).fetchone()[0]
+        j_end = cur.execute("SELECT julianday(?)", (end,)).fetchone()[0]
+        width = max((j_end - j_start) / bins, 1e-9)
+        cur.execute(
+            f"""
+            SELECT e.category, e.country,
+                   MIN(MAX(CAST((julianday(e.date_start) - ?) / ? AS INTEGER), 0), ?) AS bin,
+                   COUNT(*)
+            FROM events e {where}
+            GROUP BY e.category, e.country, bin
+            """,
+            [j_start, width, bins - 1] + params,
+        )
+        rows = [tuple(row) for row in cur.fetchall()]
+    return rows
+
+def get_event_by_id(event_id):
+    """Retrieve a single event by its primary key."""
+    with connect_db() as conn:
+        cur = conn.cursor()
+        cur.execute(EVENT_SELECT + " WHERE e.id = ?", (event_id,))
+        row = cur.fetchone()
+        event = dict(row) if row else None
+    return event
+
+def get_facets(include_empty=False):
+    """Return the distinct non-empty categories, topics and countries, sorted.
+
+    With ``include_empty`` an empty string is kept as a value too, so filters
+    built from the lists still match events that leave a field blank.
+
+    Each list is read with a loose index scan (one index seek per distinct
+    value), so the cost depends on the number of distinct values rather than
+    the number of events.
+    """
+    lowest = ">=" if include_empty else ">"
+    with connect_db() as conn:
+        cur = conn.cursor()
+        facets = {}
+        for key, column in (("categories", "category"), ("topics", "topic"), ("countries", "country")):
+            cur.execute(
+                f"""
+                WITH RECURSIVE facet(value) AS (
+                    SELECT MIN({column}) FROM events WHERE {column} {lowest} ''
+                    UNION ALL
+                    SELECT (SELECT MIN({column}) FROM events WHERE {column} > facet.value)
+                    FROM facet WHERE facet.value IS NOT NULL
+                )
+                SELECT value FROM facet WHERE value IS NOT NULL
+                """
+            )
+            facets[key] = [row[0] for row in cur.fetchall()]
+    return facets
+
 def get_event_by_tag(tag):
     """Retrieve a single event by its tag (unique identifier)."""
-    conn = connect_db()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM events WHERE tag = ?", (tag,))
-    row = cur.fetchone()
-    event = dict(row) if row else None
-    conn.close()
+    with connect_db() as conn:
+        cur = conn.cursor()
+        cur.execute(EVENT_SELECT + " WHERE e.tag = ?", (tag,))
+        row = cur.fetchone()
+        event = dict(row) if row else None
     return event
 
-def insert_event(category, topic, name, country, date_start, date_end, description, tag, affected_by, affects):
-    """Insert a new event record into the database."""
-    conn = connect_db()
-    cur = conn.cursor()
-    try:
+# Link field followed by each direction of get_causal_chain
+CHAIN_DIRECTIONS = {"downstream": "affects", "upstream": "affected_by"}
+
+def get_causal_chain(tag, direction="downstream", max_depth=5, max_fanout=50, max_nodes=500):
+    """Return the events reachable from ``tag`` by following causal links.
+
+    ``direction`` is ``"downstream"`` (what the event affects) or ``"upstream"``
+    (what affected it). The walk is a breadth-first recursive CTE: each event
+    is expanded once per depth at most, so cycles cannot loop, and only the
+    first ``max_fanout`` links of each event are followed, so hub events stay
+    cheap. At most ``max_nodes`` events are returned, nearest first.
+
+    Each result is an event summary (``id``, ``tag``, ``name``, ``date_start``,
+    ``date_end``) with its ``depth`` (1 = direct link), ``parents`` (tags one
+    step closer to ``tag`` that link to it) and ``truncated`` (whether some of
+    its own links were skipped by the fan-out cap).
+    """
+    if direction not in CHAIN_DIRECTIONS:
+        raise ValueError(f"Unsupported direction: {direction}")
+    own, other = LINK_FIELDS[CHAIN_DIRECTIONS[direction]]
+    with connect_db() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM events WHERE tag = ?", (tag,))
+        row = cur.fetchone()
+        if row is None:
+            return []
+        root = row["id"]
         cur.execute(
-            """
-        INSERT INTO events
-        (category, topic, name, country, date_start, date_end, description, tag, affected_by, affects)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-            (category, topic, name, country, date_start, date_end, description, tag, affected_by, affects),
+            f"""
+            WITH RECURSIVE chain(id, depth) AS (
+                SELECT ?, 0
+                UNION
+                SELECT l.{other}, c.depth + 1
+                FROM chain c JOIN event_links l ON l.{own} = c.id
+                WHERE c.depth < ? AND l.{other} IN (
+                    SELECT {other} FROM event_links WHERE {own} = c.id LIMIT ?
+                )
+                LIMIT ?
+            )
+            SELECT e.id, e.tag, e.name, e.date_start, e.date_end, MIN(c.depth) AS depth,
+                   EXISTS (SELECT 1 FROM event_links WHERE {own} = e.id
+                           LIMIT 1 OFFSET ?) AS truncated
+            FROM chain c JOIN events e ON e.id = c.id
+            WHERE c.id != ?
+            GROUP BY e.id
+            ORDER BY depth, e.date_start
+            LIMIT ?
+            """,
+            (root, max_depth, max_fanout, max_nodes * max(max_depth, 1), max_fanout, root, max_nodes),
         )
-        conn.commit()
-    except sqlite3.IntegrityError as exc:
-        raise ValueError("An event with this tag already exists.") from exc
-    finally:
-        conn.close()
+        nodes = [dict(row) for row in cur.fetchall()]
+        depth_of = {node["id"]: node["depth"] for node in nodes}
+        depth_of[root] = 0
+        tag_of = {node["id"]: node["tag"] for node in nodes}
+        tag_of[root] = tag
+        for node in nodes:
+            node["truncated"] = bool(node["truncated"])
+            node["parents"] = []
+        by_id = {node["id"]: node for node in nodes}
+        ids = list(depth_of)
+        if nodes:
+            # Edges between chain members that lead one step further out
+            marks = ",".join("?" * len(ids))
+            cur.execute(
+                f"SELECT {own}, {other} FROM event_links"
+                f" WHERE {own} IN ({marks}) AND {other} IN ({marks})",
+                ids + ids,
+            )
+            for parent, child in cur.fetchall():
+                if child in by_id and depth_of[parent] == depth_of[child] - 1:
+                    by_id[child]["parents"].append(tag_of[parent])
+    return nodes
+
+def insert_event(category, topic, name, country, date_start, date_end, description, tag, affected_by, affects):
+    """Insert a new event record into the database.
+
+    ``affected_by`` and ``affects`` are tags (comma-separated string or list) of
+    existing events; each becomes a row in ``event_links``.
+    """
+    with connect_db() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                """
+            INSERT INTO events
+            (category, topic, name, country, date_start, date_end, description, tag)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                (category, topic, name, country, date_start, date_end, description, tag),
+            )
+            event_id = cur.lastrowid
+            _link_tags(cur, event_id, "affected_by", affected_by)
+            _link_tags(cur, event_id, "affects", affects)
+            conn.commit()
+        except sqlite3.IntegrityError as exc:
+            raise ValueError("An event with this tag already exists.") from exc
+    _bump_version()
 # --- add below insert_event() -----------------------------------------------
 def update_event(event_id, **fields):
     """
     Update any subset of columns for a given event_id.
     Usage: update_event(5, name="New Name", description="…")
+    Passing ``affects`` or ``affected_by`` replaces that side of the event's links.
     """
     if not fields:
         return
-    cols = ", ".join(f"{k}=?" for k in fields.keys())
-    values = list(fields.values()) + [event_id]
-    conn = connect_db()
-    cur = conn.cursor()
-    cur.execute(f"UPDATE events SET {cols} WHERE id = ?", values)
-    conn.commit()
-    conn.close()
+    links = {f: fields.pop(f) for f in LINK_FIELDS if f in fields}
+    with connect_db() as conn:
+        cur = conn.cursor()
+        if fields:
+            cols = ", ".join(f"{k}=?" for k in fields.keys())
+            values = list(fields.values()) + [event_id]
+            cur.execute(f"UPDATE events SET {cols} WHERE id = ?", values)
+        for field, tags in links.items():
+            own, _ = LINK_FIELDS[field]
+            cur.execute(f"DELETE FROM event_links WHERE {own} = ?", (event_id,))
+            _link_tags(cur, event_id, field, tags)
+        conn.commit()
+    _bump_version()
 
 def delete_event(event_id):
     """Remove an event entirely (and clean dangling links)."""
-    conn = connect_db()
-    cur = conn.cursor()
-    # First pull its tag so we can strip it from other rows’ affects/affected_by
-    cur.execute("SELECT tag FROM events WHERE id = ?", (event_id,))
-    row = cur.fetchone()
-    tag = row["tag"] if row else None
-    # Delete the event itself
-    cur.execute("DELETE FROM events WHERE id = ?", (event_id,))
-    if tag:
-        # Remove the tag from all other rows’ link fields
-        for field in ("affects", "affected_by"):
-            # Fetch rows referencing the tag
-            cur.execute(f"SELECT id, {field} FROM events WHERE INSTR({field}, ?) > 0", (tag,))
-            for row in cur.fetchall():
-                parts = [t for t in (row[field] or "").split(',') if t and t != tag]
-                new_val = ",".join(parts)
-                cur.execute(f"UPDATE events SET {field} = ? WHERE id = ?", (new_val, row["id"]))
-    conn.commit()
-    conn.close()
-    
+    with connect_db() as conn:
+        cur = conn.cursor()
+        # Both lookups are served by an index, so no table scan is needed
+        cur.execute("DELETE FROM event_links WHERE source_id = ?", (event_id,))
+        cur.execute("DELETE FROM event_links WHERE target_id = ?", (event_id,))
+        cur.execute("DELETE FROM events WHERE id = ?", (event_id,))
+        conn.commit()
+    _bump_version()
+
 def add_relation_tag(event_tag, field, related_tag):
     """
-    Append a related event tag to an existing event's `affects` or `affected_by` field.
-    This maintains a two-way link between events.
+    Link ``related_tag`` to an existing event through its `affects` or `affected_by` field.
+    A single ``event_links`` row serves both directions, so the link is two-way.
     """
-    if field not in ("affects", "affected_by"):
+    if field not in LINK_FIELDS:
         return
-    conn = connect_db()
-    cur = conn.cursor()
-    # Get current list of related tags for the given event
-    cur.execute(f"SELECT {field} FROM events WHERE tag = ?", (event_tag,))
-    row = cur.fetchone()
-    if not row:
-        conn.close()
+    with connect_db() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM events WHERE tag = ?", (event_tag,))
+        row = cur.fetchone()
+        if row:
+            _link_tags(cur, row["id"], field, related_tag)
+            conn.commit()
+            _bump_version()
+
+# Columns accepted by ``import_events``; links may be lists or comma-separated tags
+IMPORT_FIELDS = ("category", "topic", "name", "country", "date_start", "date_end",
+                 "description", "tag", "affected_by", "affects")
+REQUIRED_IMPORT_FIELDS = ("category", "topic", "name", "date_start")
+
+def _read_rows(path, fmt):
+    """Yield ``(line number, row dict or None, error)`` from a CSV or JSONL file."""
+    with open(path, newline="", encoding="utf-8") as fh:
+        if fmt == "csv":
+            reader = csv.DictReader(fh)
+            for row in reader:
+                yield reader.line_num, row, None
+            return
+        for line_num, line in enumerate(fh, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield line_num, None, f"invalid JSON: {exc.msg}"
+                continue
+            if not isinstance(row, dict):
+                yield line_num, None, "expected a JSON object"
+                continue
+            yield line_num, row, None
+
+def _clean_import_row(row):
+    """Validate one input row; return ``(record, error)``."""
+    record = {}
+    for field in IMPORT_FIELDS:
+        value = row.get(field)
+        if isinstance(value, str):
+            value = value.strip()
+        elif field in LINK_FIELDS and isinstance(value, list):
+            if not all(isinstance(tag, str) for tag in value):
+                return None, f"invalid {field}: expected a list of tags"
+        elif value is not None:
+            return None, f"invalid {field}: expected a string, got {type(value).__name__}"
+        record[field] = value if value not in ("", None, []) else None
+    missing = [f for f in REQUIRED_IMPORT_FIELDS if not record[f]]
+    if missing:
+        return None, "missing " + ", ".join(missing)
+    for field in ("date_start", "date_end"):
+        if record[field]:
+            try:
+                datetime.fromisoformat(record[field])
+            except (TypeError, ValueError):
+                return None, f"invalid {field}: {record[field]!r}"
+    if record["date_end"] and record["date_end"] < record["date_start"]:
+        return None, "date_end is earlier than date_start"
+    record["tag"] = record["tag"] or make_tag(
+        record["category"], record["topic"], record["name"], record["date_start"])
+    record["country"] = record["country"] or ""
+    record["description"] = record["description"] or ""
+    return record, None
+
+def import_events(path, fmt=None, batch_size=10000, rejects=None):
+    """Stream events from a CSV or JSONL file into the database.
+
+    Rows are inserted with ``executemany`` in transactions of ``batch_size``
+    rows. ``affects``/``affected_by`` tags are staged in a temporary table and
+    resolved in a second pass, so links may point at rows later in the file.
+    Memory use does not depend on the file size. Rejected rows are written to
+    the ``rejects`` file object as JSON lines when given. Returns a dict with
+    ``read``, ``inserted``, ``rejected``, ``links`` and ``seconds``.
+    """
+    fmt = fmt or ("csv" if str(path).lower().endswith(".csv") else "jsonl")
+    started = time.perf_counter()
+    stats = {"read": 0, "inserted": 0, "rejected": 0, "links": 0}
+    with connect_db() as conn:
+        cur = conn.cursor()
+        cur.execute("DROP TABLE IF EXISTS temp.import_links")
+        cur.execute("CREATE TEMP TABLE import_links (source_tag TEXT, target_tag TEXT)")
+
+        def reject(line_num, reason):
+            stats["rejected"] += 1
+            if rejects is not None:
+                rejects.write(json.dumps({"line": line_num, "reason": reason}) + "\n")
+
+        def flush(batch):
+            tags = [record["tag"] for _, record in batch]
+            taken = set()
+            for i in range(0, len(tags), IN_CHUNK_SIZE):
+                chunk = tags[i:i + IN_CHUNK_SIZE]
+                cur.execute(
+                    f"SELECT tag FROM events WHERE tag IN ({','.join('?' * len(chunk))})", chunk)
+                taken.update(row[0] for row in cur.fetchall())
+            rows, links = [], []
+            for line_num, record in batch:
+                if record["tag"] in taken:
+                    reject(line_num, f"duplicate tag {record['tag']!r}")
+                    continue
+                taken.add(record["tag"])
+                rows.append(tuple(record[f] for f in IMPORT_FIELDS[:8]))
+                links.extend((record["tag"], t) for t in split_tags(record["affects"]))
+                links.extend((t, record["tag"]) for t in split_tags(record["affected_by"]))
+            cur.executemany(
+                """
+                INSERT INTO events
+                (category, topic, name, country, date_start, date_end, description, tag)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            cur.executemany("INSERT INTO import_links VALUES (?, ?)", links)
+            conn.commit()
+            stats["inserted"] += len(rows)
+
+        try:
+            batch = []
+            for line_num, row, error in _read_rows(path, fmt):
+                stats["read"] += 1
+                record = None
+                if error is None:
+                    record, error = _clean_import_row(row)
+                if error:
+                    reject(line_num, error)
+                    continue
+                batch.append((line_num, record))
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+            if batch:
+                flush(batch)
+            # Second pass: every tag now has an id, so links can be resolved in SQL
+            cur.execute(
+                """
+                INSERT OR IGNORE INTO event_links (source_id, target_id)
+                SELECT s.id, t.id FROM import_links l
+                JOIN events s ON s.tag = l.source_tag
+                JOIN events t ON t.tag = l.target_tag
+                WHERE s.id != t.id
+                """
+            )
+            stats["links"] = cur.rowcount
+            conn.commit()
+        finally:
+            cur.execute("DROP TABLE IF EXISTS temp.import_links")
+            # Batches committed before a failure are already visible
+            _bump_version()
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+# Columns written by ``export_events``, in order
+EXPORT_FIELDS = ("id", "category", "topic", "name", "country", "date_start", "date_end",
+                 "description", "tag", "affected_by", "affects")
+
+def iter_event_chunks(categories=None, countries=None, start=None, end=None, chunk_size=10000):
+    """Yield the events matching the timeline filters in lists of ``chunk_size``.
+
+    Rows are stepped from a single cursor with ``fetchmany``, so at most one
+    chunk is held in memory. Filters behave as in :func:`query_events`.
+    """
+    if categories is not None and len(categories) == 0:
         return
-    current_val = row[0] if row[0] is not None else ""
-    existing_tags = [t for t in current_val.split(",") if t]  # split by comma to list
-    if related_tag in existing_tags:
-        conn.close()
-        return  # already linked
-    # Append the new tag to the comma-separated list
-    new_val = related_tag if current_val == "" or current_val is None else current_val + "," + related_tag
-    cur.execute(f"UPDATE events SET {field} = ? WHERE tag = ?", (new_val, event_tag))
-    conn.commit()
-    conn.close()
-
-def main():
-    """Optional CLI to initialize the database."""
+    if countries is not None and len(countries) == 0:
+        return
+    where, params = filter_clause(categories, countries, start, end)
+    # Leaving the block (also when the generator is closed early) releases it
+    with connect_db() as conn:
+        cur = conn.cursor()
+        cur.execute(EVENT_SELECT + where + " ORDER BY e.id", params)
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield [dict(row) for row in rows]
+
+def _arrow_writer(path, fmt):
+    """Return ``(pyarrow, schema, writer)`` for an Arrow IPC or Parquet file."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(f, pa.int64() if f == "id" else pa.string()) for f in EXPORT_FIELDS])
+    if fmt == "parquet":
+        return pa, schema, pq.ParquetWriter(path, schema)
+    return pa, schema, pa.ipc.new_file(path, schema)
+
+def export_events(path, fmt=None, categories=None, countries=None, start=None, end=None,
+                  chunk_size=10000):
+    """Stream the events matching the timeline filters to a JSONL, Arrow or Parquet file.
+
+    Links are resolved to comma-separated tags as in :func:`get_events`. Each
+    chunk is written as it is read (one Arrow record batch or Parquet row
+    group per chunk, built through pandas), so memory use does not depend on
+    the number of events. Returns a dict with ``exported`` and ``seconds``.
+    """
+    if fmt is None:
+        suffix = Path(path).suffix.lower()
+        fmt = {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}.get(suffix, "jsonl")
+    if fmt not in ("jsonl", "arrow", "parquet"):
+        raise ValueError(f"Unsupported export format: {fmt}")
+    started = time.perf_counter()
+    chunks = iter_event_chunks(categories, countries, start, end, chunk_size)
+    exported = 0
+    if fmt == "jsonl":
+        with open(path, "w", encoding="utf-8") as fh:
+            for chunk in chunks:
+                fh.writelines(json.dumps(ev, ensure_ascii=False) + "\n" for ev in chunk)
+                exported += len(chunk)
+    else:
+        import pandas as pd
+
+        pa, schema, writer = _arrow_writer(path, fmt)
+        try:
+            for chunk in chunks:
+                frame = pd.DataFrame.from_records(chunk, columns=EXPORT_FIELDS)
+                writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+                exported += len(chunk)
+        finally:
+            writer.close()
+    return {"exported": exported, "seconds": time.perf_counter() - started}
+
+def main(argv=None):
+    """Optional CLI to initialize the database, import/export events or check query plans."""
     parser = argparse.ArgumentParser(description="Manage the events database")
     parser.add_argument(
         "--db",
         default=os.environ.get("EVENTS_DB_FILE", str(DEFAULT_DB_PATH)),
         help="Path to the SQLite database file",
     )
-    args = parser.parse_args()
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("init", help="Create the schema and seed data (default)")
+    importer = commands.add_parser("import", help="Bulk-load events from CSV or JSONL")
+    importer.add_argument("file", help="Input file (.csv or .jsonl)")
+    importer.add_argument("--format", choices=("csv", "jsonl"),
+                          help="Input format (default: from the file extension)")
+    importer.add_argument("--batch-size", type=int, default=10000,
+                          help="Rows per transaction (default: 10000)")
+    importer.add_argument("--rejects", help="Write rejected rows as JSON lines to this file")
+    exporter = commands.add_parser("export", help="Stream events to JSONL, Arrow or Parquet")
+    exporter.add_argument("file", help="Output file (.jsonl, .arrow or .parquet)")
+    exporter.add_argument("--format", choices=("jsonl", "arrow", "parquet"),
+                          help="Output format (default: from the file extension)")
+    exporter.add_argument("--category", action="append",
+                          help="Only export this category (repeatable)")
+    exporter.add_argument("--country", action="append",
+                          help="Only export this country (repeatable)")
+    exporter.add_argument("--start", help="Only export events ending on or after this date")
+    exporter.add_argument("--end", help="Only export events starting on or before this date")
+    exporter.add_argument("--chunk-size", type=int, default=10000,
+                          help="Rows read and written per chunk (default: 10000)")
+    commands.add_parser("check-plans",
+                        help="Report statements that scan a whole table under the current schema")
+    args = parser.parse_args(argv)
     global DB_FILE
     DB_FILE = args.db
+    if args.command == "check-plans":
+        # Explain against the schema as it is, without migrating it first
+        raise SystemExit(1 if check_query_plans() else 0)
     init_db()
-    print(f"Initialized database at {DB_FILE}")
+    if args.command == "import":
+        rejects = open(args.rejects, "w", encoding="utf-8") if args.rejects else None
+        try:
+            stats = import_events(args.file, args.format, args.batch_size, rejects)
+        finally:
+            if rejects:
+                rejects.close()
+        rate = stats["inserted"] / stats["seconds"] if stats["seconds"] else 0
+        print(f"Imported {stats['inserted']} of {stats['read']} rows into {DB_FILE} "
+              f"in {stats['seconds']:.1f}s ({rate:,.0f} rows/s); "
+              f"{stats['rejected']} rejected, {stats['links']} links")
+    elif args.command == "export":
+        stats = export_events(args.file, args.format, args.category, args.country,
+                              args.start, args.end, args.chunk_size)
+        print(f"Exported {stats['exported']} events from {DB_FILE} to {args.file} "
+              f"in {stats['seconds']:.1f}s")
+    else:
+        print(f"Initialized database at {DB_FILE}")
+
+# Calls whose statements check_query_plans explains, with whether a full scan
+# is expected (reading every event cannot use an index)
+def _plan_workload(tag, event_id):
+    return [
+        ("get_events", lambda: get_events(), True),
+        ("iter_event_chunks", lambda: list(iter_event_chunks(chunk_size=10)), True),
+        ("query_events (filters)", lambda: query_events(
+            ["Politics"], ["Global"], "1900-01-01", "2000-01-01"), False),
+        ("query_events (dates)", lambda: query_events(start="1900-01-01", end="2000-01-01"), False),
+        ("query_events (search)", lambda: query_events(search="war"), False),
+        ("count_events", lambda: count_events(["Politics"], ["Global"], "1900-01-01"), False),
+        ("date_bounds", lambda: date_bounds(["Politics"], ["Global"]), False),
+        ("event_density", lambda: event_density(
+            ["Politics"], ["Global"], "1900-01-01", "2000-01-01", 10), False),
+        ("get_event_by_id", lambda: get_event_by_id(event_id), False),
+        ("get_event_by_tag", lambda: get_event_by_tag(tag), False),
+        ("get_event_labels", lambda: get_event_labels([tag]), False),
+        ("get_facets", lambda: get_facets(), False),
+        ("search_events", lambda: search_events("war", 10), False),
+        ("get_causal_chain", lambda: get_causal_chain(tag, "downstream"), False),
+        ("get_causal_chain (upstream)", lambda: get_causal_chain(tag, "upstream"), False),
+        ("add_relation_tag", lambda: add_relation_tag(tag, "affects", tag), False),
+        ("update_event", lambda: update_event(event_id, name="Plan check", affects=tag), False),
+        ("delete_event", lambda: delete_event(event_id), False),
+    ]
+
+# A whole table or index is read by "SCAN x [USING INDEX i]" and by a bare
+# "SEARCH x" (no index), which SQLite prints for MIN()/MAX() without an index
+_SCAN = re.compile(r"^(?:SCAN (\w+)(?: USING (?:COVERING )?INDEX \S+)?|SEARCH (\w+))$")
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+
+def full_scans(conn, sql, plan):
+    """Return the plan lines of ``sql`` that read a whole table or index."""
+    tables = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND sql NOT LIKE 'CREATE VIRTUAL%'")}
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        aliases[table] = table
+        if alias and alias.upper() not in ("WHERE", "ON", "JOIN", "LEFT", "INNER", "GROUP",
+                                           "ORDER", "LIMIT", "USING"):
+            aliases[alias] = table
+    scans = []
+    for line in plan:
+        match = _SCAN.match(line)
+        name = match and (match.group(1) or match.group(2))
+        if name and aliases.get(name, name) in tables:
+            scans.append(line)
+    return scans
+
+def check_query_plans(out=None):
+    """Explain every statement this module runs and report full-table scans.
+
+    The schema of the current database (tables, indexes, triggers and any
+    ``ANALYZE`` statistics) is copied into a scratch database, and a
+    representative call of each query function runs there with statement
+    tracing on, so the live data is never touched. Returns the list of
+    ``(call, sql, scan lines)`` for scans that are not expected.
+    """
+    import sys
+    import tempfile
+
+    out = out or sys.stdout
+    global DB_FILE
+    source_file = DB_FILE
+    source = sqlite3.connect(source_file)
+    schema = source.execute(
+        "SELECT sql FROM sqlite_master"
+        " WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' ORDER BY rowid"
+    ).fetchall()
+    has_stats = source.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+    stats = source.execute("SELECT * FROM sqlite_stat1").fetchall() if has_stats else []
+    source.close()
+
+    scratch_dir = tempfile.mkdtemp(prefix="plan-check-")
+    scratch_file = os.path.join(scratch_dir, "events.db")
+    scratch = sqlite3.connect(scratch_file)
+    for (sql,) in schema:
+        try:
+            scratch.execute(sql)
+        except sqlite3.OperationalError as exc:
+            # Shadow tables of a virtual table are created along with it
+            if "already exists" not in str(exc):
+                raise
+    if stats:
+        scratch.execute("ANALYZE sqlite_master")
+        scratch.execute("DELETE FROM sqlite_stat1")
+        scratch.executemany("INSERT INTO sqlite_stat1 VALUES (?, ?, ?)", stats)
+    scratch.commit()
+    scratch.close()
+
+    problems = []
+    DB_FILE = scratch_file
+    try:
+        tag = "Plan_Check_Event_2000"
+        insert_event("Politics", "Check", "Event", "Global", "2000-01-01", None, "",
+                     tag, "", "")
+        event_id = get_event_labels([tag])[0]["id"]
+        with connect_db() as conn:
+            for label, call, scan_expected in _plan_workload(tag, event_id):
+                statements = []
+                conn.set_trace_callback(statements.append)
+                try:
+                    call()
+                finally:
+                    conn.set_trace_callback(None)
+                for sql in dict.fromkeys(statements):
+                    if not re.match(r"\s*(SELECT|WITH|INSERT|UPDATE|DELETE)\b", sql, re.IGNORECASE):
+                        continue
+                    scans = full_scans(conn, sql, explain(conn, sql))
+                    if scans and not scan_expected:
+                        problems.append((label, sql, scans))
+                        print(f"FULL SCAN in {label}: {' '.join(sql.split())}", file=out)
+                        for line in scans:
+                            print(f"    {line}", file=out)
+    finally:
+        DB_FILE = source_file
+        _pool.close()
+        for name in os.listdir(scratch_dir):
+            os.unlink(os.path.join(scratch_dir, name))
+        os.rmdir(scratch_dir)
+    print(f"{len(problems)} unexpected full scan(s) in {source_file}", file=out)
+    return problems
+
+# Opt-in latency/row-count instrumentation (TIMELINE_METRICS) of the queries
+# and writes; small helpers such as split_tags or data_version stay unwrapped
+metrics.instrument_module(globals(), "db", (
+    "get_events", "reachable_tags", "events_overlapping", "match_events", "get_event_labels",
+    "search_events", "query_events", "count_events", "date_bounds", "event_density",
+    "get_event_by_id", "get_facets", "get_event_by_tag", "get_causal_chain",
+    "insert_event", "update_event", "delete_event", "add_relation_tag",
+    "import_events", "export_events",
+))
 
 
 if __name__ == "__main__":
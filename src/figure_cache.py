@@ -0,0 +1,77 @@
+import json
+import threading
+from collections import OrderedDict
+
+import plotly.io as pio
+
+import metrics
+
+
+class FigureCache:
+    """Bounded LRU cache of serialized Plotly figures.
+
+    Figures are stored as JSON text, which is what Dash sends to the browser
+    anyway. The cache is bounded by both entry count and total bytes.
+    """
+
+    def __init__(self, max_entries=32, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (serialized figure, size in bytes)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached figure for ``key`` as a dict, or ``None``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return json.loads(entry[0])
+
+    def put(self, key, figure):
+        """Serialize and store ``figure`` under ``key``.
+
+        Returns the figure as a dict, the same form ``get`` returns, whether
+        or not it fit in the cache.
+        """
+        with metrics.timer("figure_cache", "serialize"):
+            payload = pio.to_json(figure, validate=False)
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes or self.max_entries <= 0:
+            return json.loads(payload)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (payload, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+        return json.loads(payload)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Hit/miss counters and current size, for tuning the limits."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,91 @@
+from bisect import bisect_left, bisect_right
+
+# Sentinels bounding every ISO date string
+MIN_DATE = ""
+MAX_DATE = "\uffff"
+
+
+class _Node:
+    """Tree node holding the intervals that contain ``center``."""
+
+    __slots__ = ("center", "starts", "by_start", "ends", "by_end", "left", "right")
+
+    def __init__(self, center, intervals):
+        # ``intervals`` arrive sorted by start
+        by_end = sorted(intervals, key=lambda iv: iv[1])
+        self.center = center
+        self.starts = [iv[0] for iv in intervals]
+        self.by_start = [iv[2] for iv in intervals]
+        self.ends = [iv[1] for iv in by_end]
+        self.by_end = [iv[2] for iv in by_end]
+        self.left = None
+        self.right = None
+
+
+def _build(intervals):
+    """Build a centered interval tree from ``(start, end, item)`` tuples sorted by start.
+
+    The median start is used as the center, so each subtree holds at most half
+    of the intervals and the node itself is never empty.
+    """
+    if not intervals:
+        return None
+    center = intervals[len(intervals) // 2][0]
+    left, right, here = [], [], []
+    for iv in intervals:
+        if iv[1] < center:
+            left.append(iv)
+        elif iv[0] > center:
+            right.append(iv)
+        else:
+            here.append(iv)
+    node = _Node(center, here)
+    node.left = _build(left)
+    node.right = _build(right)
+    return node
+
+
+class IntervalIndex:
+    """Static centered interval tree over event date ranges.
+
+    Events are keyed on ISO date strings, with a missing ``date_end`` treated
+    as an instant at ``date_start``. ``overlapping`` answers range queries in
+    O(log n + k).
+    """
+
+    def __init__(self, events):
+        self._size = len(events)
+        self._root = _build(sorted(
+            ((ev["date_start"], ev["date_end"] or ev["date_start"], ev) for ev in events),
+            key=lambda iv: iv[0],
+        ))
+
+    def __len__(self):
+        return self._size
+
+    def overlapping(self, start=None, end=None):
+        """Return the events whose range overlaps ``[start, end]``.
+
+        ``None`` leaves that side of the window open.
+        """
+        lo = start or MIN_DATE
+        hi = end or MAX_DATE
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if hi < node.center:
+                # Everything here ends after hi, so only the start matters
+                found.extend(node.by_start[:bisect_right(node.starts, hi)])
+                stack.append(node.left)
+            elif lo > node.center:
+                # Everything here starts before lo, so only the end matters
+                found.extend(node.by_end[bisect_left(node.ends, lo):])
+                stack.append(node.right)
+            else:
+                found.extend(node.by_start)
+                stack.append(node.left)
+                stack.append(node.right)
+        return found
@@ -0,0 +1,190 @@
+import os
+import time
+import threading
+import functools
+import inspect
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+
+# Instrumentation is opt-in; when off, ``instrument`` returns functions unchanged
+ENABLED = os.environ.get("TIMELINE_METRICS", "").lower() in ("1", "true", "yes")
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds (bytes) of the response size histogram buckets
+SIZE_BUCKETS = tuple(2 ** p for p in range(10, 27, 2))
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Latency histograms, error counts and row counts per ``(kind, name)``,
+    plus response size histograms per Dash callback output."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}
+        self.errors = {}
+        self.rows = {}
+        self.response_bytes = {}
+
+    def observe_call(self, kind, name, seconds, rows=None, error=False):
+        key = (kind, name)
+        with self._lock:
+            hist = self.latency.get(key)
+            if hist is None:
+                hist = self.latency[key] = Histogram(LATENCY_BUCKETS)
+            hist.observe(seconds)
+            if error:
+                self.errors[key] = self.errors.get(key, 0) + 1
+            if rows is not None:
+                self.rows[key] = self.rows.get(key, 0) + rows
+
+    def observe_response(self, output, size):
+        with self._lock:
+            hist = self.response_bytes.get(output)
+            if hist is None:
+                hist = self.response_bytes[output] = Histogram(SIZE_BUCKETS)
+            hist.observe(size)
+
+    def clear(self):
+        with self._lock:
+            self.latency.clear()
+            self.errors.clear()
+            self.rows.clear()
+            self.response_bytes.clear()
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def histogram(metric, label_sets):
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, hist in label_sets:
+                cumulative = 0
+                for bound, count in zip(hist.bounds + (float("inf"),), hist.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"{metric}_sum{{{labels}}} {hist.sum!r}")
+                lines.append(f"{metric}_count{{{labels}}} {hist.count}")
+
+        def counter(metric, values):
+            lines.append(f"# TYPE {metric} counter")
+            for labels, value in values:
+                lines.append(f"{metric}{{{labels}}} {value}")
+
+        def call_labels(key):
+            return f'kind="{_escape(key[0])}",name="{_escape(key[1])}"'
+
+        with self._lock:
+            histogram("timeline_call_seconds",
+                      [(call_labels(k), h) for k, h in sorted(self.latency.items())])
+            counter("timeline_call_errors_total",
+                    [(call_labels(k), v) for k, v in sorted(self.errors.items())])
+            counter("timeline_call_rows_total",
+                    [(call_labels(k), v) for k, v in sorted(self.rows.items())])
+            histogram("timeline_callback_response_bytes",
+                      [(f'output="{_escape(k)}"', h)
+                       for k, h in sorted(self.response_bytes.items())])
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Registry()
+
+
+def instrument(kind, name=None):
+    """Decorator recording the latency, errors and returned rows of a function.
+
+    The length of a returned list is recorded as its row count; other results,
+    including fixed-size tuples, record none. Generator functions and everything else
+    are returned unchanged while ``ENABLED`` is false, so instrumentation
+    costs nothing when it is off.
+    """
+
+    def decorate(fn):
+        if not ENABLED or inspect.isgeneratorfunction(fn):
+            return fn
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                registry.observe_call(kind, label, time.perf_counter() - start, error=True)
+                raise
+            rows = len(result) if isinstance(result, list) else None
+            registry.observe_call(kind, label, time.perf_counter() - start, rows)
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+def instrument_module(namespace, kind, names):
+    """Instrument the functions ``names`` of the module ``namespace`` in place."""
+    if not ENABLED:
+        return
+    for attr in names:
+        namespace[attr] = instrument(kind)(namespace[attr])
+
+
+@contextmanager
+def _timer(kind, name):
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        registry.observe_call(kind, name, time.perf_counter() - start, error=error)
+
+
+_NULL_TIMER = nullcontext()
+
+
+def timer(kind, name):
+    """Context manager timing a block as ``(kind, name)``; a no-op when disabled."""
+    return _timer(kind, name) if ENABLED else _NULL_TIMER
+
+
+def init_app(server):
+    """Add the ``/metrics`` route and callback response sizes to a Flask ``server``."""
+    if not ENABLED:
+        return
+    from flask import Response, request
+
+    @server.after_request
+    def record_callback_response(response):
+        if request.path.endswith("/_dash-update-component"):
+            body = request.get_json(silent=True) or {}
+            output = body.get("output", "unknown")
+            registry.observe_response(output, response.calculate_content_length() or 0)
+        return response
+
+    @server.route("/metrics")
+    def metrics_endpoint():
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,38 @@
+from bisect import bisect_left
+
+
+class NameIndex:
+    """Prefix index over event names and tags.
+
+    Lookups run against a sorted key list that holds each event's full name,
+    its tag and every later word of the name, so "war" finds "Cold War".
+    Only ``(id, name, tag)`` is kept per event, not the event itself.
+    """
+
+    def __init__(self, events):
+        self._labels = []
+        keys = []
+        for pos, ev in enumerate(events):
+            self._labels.append((ev["id"], ev["name"], ev["tag"]))
+            name = (ev["name"] or "").lower()
+            tag = (ev["tag"] or "").lower()
+            keys.append((name, pos))
+            keys.append((tag, pos))
+            keys.extend((word, pos) for word in name.split()[1:])
+        keys.sort()
+        self._keys = [key for key, _ in keys]
+        self._positions = [pos for _, pos in keys]
+
+    def search(self, text, limit):
+        """Return ``id``/``name``/``tag`` of up to ``limit`` events whose name,
+        tag or a word of the name starts with ``text``."""
+        text = (text or "").strip().lower()
+        found, seen = [], set()
+        i = bisect_left(self._keys, text)
+        while i < len(self._keys) and len(found) < limit and self._keys[i].startswith(text):
+            pos = self._positions[i]
+            if pos not in seen:
+                seen.add(pos)
+                found.append(pos)
+            i += 1
+        return [dict(zip(("id", "name", "tag"), self._labels[pos])) for pos in found]
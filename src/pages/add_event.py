@@ -1,21 +1,20 @@
 import dash
 from dash import html, dcc, callback, Input, Output, State
 import db
-import pandas as pd
-from typing import Any, cast, TypedDict
+from metrics import instrument
+from typing import TypedDict
 import dash_mantine_components as dmc
+from pickers import register_event_picker
 
 dash.register_page(__name__, name="Add Event", path="/add_event")
 
 def layout():
-    # Fetch current events to populate the related-event dropdown options
-    events = db.get_events()
-    events_all_df: pd.DataFrame = pd.DataFrame(events)   # <- this is a DataFrame
-    categories = events_all_df["category"].unique().tolist()
-    topics = events_all_df["topic"].unique().tolist()
-    countries = events_all_df["country"].unique().tolist()
-    event_options = [{"label": f'{ev["name"]} ({ev["tag"]})', "value": ev["tag"]} for ev in events]
-    
+    # Existing values to suggest in the category/topic/country inputs
+    facets = db.get_facets()
+    categories = facets["categories"]
+    topics = facets["topics"]
+    countries = facets["countries"]
+
     return html.Div([
         html.H2("Add New Event"),
         html.Div([
@@ -71,13 +70,13 @@ def layout():
         ], className="form-group"),
         html.Div([
             html.Label("Affected By (select events that cause this event):"),
-            dcc.Dropdown(id="input-affected-by", options=cast(Any, event_options),multi=True,
-                         placeholder="Select preceding related events")
+            dcc.Dropdown(id="input-affected-by", options=[],multi=True,
+                         placeholder="Type to search preceding related events")
         ], className="form-group"),
         html.Div([
             html.Label("Affects (select events that this event will cause):"),
-            dcc.Dropdown(id="input-affects", options=cast(Any, event_options), multi=True,
-                         placeholder="Select subsequent related events")
+            dcc.Dropdown(id="input-affects", options=[], multi=True,
+                         placeholder="Type to search subsequent related events")
         ], className="form-group"),
         # Submit button
         html.Button("Add Event", id="submit-event", n_clicks=0),
@@ -88,6 +87,9 @@ def layout():
         html.Div(id="form-message", className="message")
     ], className="page-container")
 
+register_event_picker("input-affected-by")
+register_event_picker("input-affects")
+
 @callback(
     Output("redirect-page", "href"),
     Output("form-message", "children"),
@@ -103,6 +105,7 @@ def layout():
     State("input-affects", "value"),
     prevent_initial_call=True
 )
+@instrument("callback")
 def submit_new_event(n_clicks, category, topic, name, country, date_start, date_end, description, affected_by, affects):
     if n_clicks is None or n_clicks < 1:
         return dash.no_update, dash.no_update
@@ -125,12 +128,8 @@ def submit_new_event(n_clicks, category, topic, name, country, date_start, date_
     if date_end and date_end < date_start:
         return dash.no_update, "End date cannot be earlier than start date."
     # Generate the unique tag for the new event (Category_Topic_Name_Year)
-    year = date_start[:4] if date_start else ""
-    tag_cat = category.strip().replace(" ", "_").replace(",", "_")
-    tag_topic = topic.strip().replace(" ", "_").replace(",", "_")
-    tag_name = name.strip().replace(" ", "_").replace(",", "_")
-    new_tag = f"{tag_cat}_{tag_topic}_{tag_name}_{year}"
-    # Prepare related tags strings for storage
+    new_tag = db.make_tag(category, topic, name, date_start)
+    # Related tags become rows in the event_links table
     affected_by_tags = affected_by if affected_by else []
     affects_tags = affects if affects else []
     # Insert the new event into the database
@@ -144,16 +143,12 @@ def submit_new_event(n_clicks, category, topic, name, country, date_start, date_
             date_end,
             (description if description else ""),
             new_tag,
-            ",".join(affected_by_tags),
-            ",".join(affects_tags),
+            affected_by_tags,
+            affects_tags,
         )
     except ValueError as exc:
         return dash.no_update, str(exc)
-    # Update related events in the database to maintain two-way relationships
-    for tag in affected_by_tags:
-        db.add_relation_tag(tag, "affects", new_tag)
-    for tag in affects_tags:
-        db.add_relation_tag(tag, "affected_by", new_tag)
+    # Each link is stored once, so the related events see it without extra writes
     # Redirect to the timeline page upon successful submission
 
     return "/", "Insertion successful! You can now view the new event in the timeline."
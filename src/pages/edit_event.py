@@ -1,23 +1,19 @@
 import dash
 from dash import html, dcc, callback, Input, Output, State
 import db
-import pandas as pd
+from metrics import instrument
 import dash_mantine_components as dmc
-from typing import Any, cast, TypedDict
+from typing import TypedDict
+from pickers import picker_options, register_event_picker
 
 dash.register_page(__name__, path="/edit_event", name="Edit Event")
 
 def layout():
-    events = db.get_events()
-    # --- type-annotation silences Pylance -----------------------------------
-    event_options = [
-        {"label": f'{ev["name"]} ({ev["tag"]})', "value": ev["id"]}
-        for ev in events
-    ]
+    # Options are searched on demand instead of listing every event
     return html.Div([
         html.H2("Edit / Delete Existing Event"),
-        dcc.Dropdown(id="event-picker", options=cast(Any, event_options),
-                     placeholder="Select an event to edit", className="full-width"),
+        dcc.Dropdown(id="event-picker", options=[],
+                     placeholder="Type to search for an event to edit", className="full-width"),
         html.Br(),
         html.Div(id="edit-form-container"),      # populated once an event is chosen
         # use callback-nav so navigating back does not reload the entire app
@@ -25,18 +21,24 @@ def layout():
         html.Div(id="edit-msg", className="message")
     ], className="page-container")
 
+register_event_picker("event-picker", value_key="id")
+register_event_picker("e-affected-by")
+register_event_picker("e-affects")
+
 # --- populate the form when an event is picked ------------------------------
 @callback(Output("edit-form-container", "children"),
           Input("event-picker", "value"))
+@instrument("callback")
 def load_event_form(selected_id):
     if not selected_id:
         return ""
-    ev = next(e for e in db.get_events() if e["id"] == selected_id)
-    events_all = db.get_events()
-    events_all_df = pd.DataFrame(db.get_events())
-    categories = events_all_df["category"].unique().tolist()
-    topics = events_all_df["topic"].unique().tolist()
-    countries = events_all_df["country"].unique().tolist()
+    ev = db.get_event_by_id(selected_id)
+    if ev is None:
+        return "Event not found"
+    facets = db.get_facets()
+    categories = facets["categories"]
+    topics = facets["topics"]
+    countries = facets["countries"]
     return html.Div([
         html.Label("Name:"),  dcc.Input(id="e-name", value=ev["name"], className="full-width"),
         html.Br(),
@@ -94,8 +96,8 @@ def load_event_form(selected_id):
                     html.Label("Affected By:"),
                     dcc.Dropdown(
                         id="e-affected-by",
-                        options=[{"label": f'{e["name"]} ({e["tag"]})', "value": e["id"]} for e in events_all],
-                        value=ev["affected_by"],
+                        options=picker_options(None, db.split_tags(ev["affected_by"]), limit=0),
+                        value=db.split_tags(ev["affected_by"]),
                         multi=True,
                         placeholder="Select events that caused this event",
                         className="full-width",
@@ -106,8 +108,8 @@ def load_event_form(selected_id):
                     html.Label("Affects:"),
                     dcc.Dropdown(
                         id="e-affects",
-                        options=[{"label": f'{e["name"]} ({e["tag"]})', "value": e["id"]} for e in events_all],
-                        value=ev["affects"],
+                        options=picker_options(None, db.split_tags(ev["affects"]), limit=0),
+                        value=db.split_tags(ev["affects"]),
                         multi=True,
                         placeholder="Select events that this event caused",
                         className="full-width",
@@ -135,9 +137,12 @@ def load_event_form(selected_id):
     State("e-category", "value"),
     State("e-topic", "value"),
     State("e-country", "value"),
+    State("e-affected-by", "value"),
+    State("e-affects", "value"),
     prevent_initial_call=True
 )
-def commit_change(n_save, n_del, ev_id, name, desc, start, end, category, topic, country):
+@instrument("callback")
+def commit_change(n_save, n_del, ev_id, name, desc, start, end, category, topic, country, affected_by, affects):
     ctx = dash.callback_context
     if not ctx.triggered or not ev_id or (n_save < 1 and n_del < 1):
         return dash.no_update, dash.no_update
@@ -150,5 +155,6 @@ def commit_change(n_save, n_del, ev_id, name, desc, start, end, category, topic,
         return dash.no_update, "Name and Start Date are required."
     db.update_event(ev_id, name=name.strip(),
                     description=(desc or "").strip(),
-                    date_start=start, date_end=end,category = category[0].strip(), topic = topic[0].strip(), country=country[0].strip())
+                    date_start=start, date_end=end,category = category[0].strip(), topic = topic[0].strip(), country=country[0].strip(),
+                    affected_by=affected_by or [], affects=affects or [])
     return "/", ""
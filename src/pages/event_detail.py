@@ -1,16 +1,62 @@
+import os
 import dash
 from dash import html, dcc, callback, Input, Output
+import plotly.graph_objects as go
 import db
+from metrics import instrument
+from pickers import picker_options, register_event_picker
 
 
 dash.register_page(__name__, path="/event_detail", name="Event Detail")
 
+# How far the causal chains are followed, and how many links per event
+CHAIN_MAX_DEPTH = int(os.environ.get("EVENT_CHAIN_MAX_DEPTH", "5"))
+CHAIN_MAX_FANOUT = int(os.environ.get("EVENT_CHAIN_MAX_FANOUT", "25"))
+
+
+def causal_graph_figure(event, upstream, downstream):
+    """Layered graph of the causal chains around ``event``.
+
+    Upstream events are drawn left of the event and downstream events right
+    of it, one column per step. All edges go into one line trace.
+    """
+    position = {event["tag"]: (0, 0)}
+    columns = {}
+    for sign, chain in ((-1, upstream), (1, downstream)):
+        for node in chain:
+            column = sign * node["depth"]
+            position[node["tag"]] = (column, columns.get(column, 0))
+            columns[column] = columns.get(column, 0) + 1
+    edge_x, edge_y = [], []
+    for sign, chain in ((-1, upstream), (1, downstream)):
+        for node in chain:
+            for parent in node["parents"]:
+                (x0, y0), (x1, y1) = position[parent], position[node["tag"]]
+                edge_x.extend((x0, x1, None))
+                edge_y.extend((y0, y1, None))
+    nodes = [event] + upstream + downstream
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=edge_x, y=edge_y, mode="lines", hoverinfo="skip",
+                             line=dict(color="#999", width=1)))
+    fig.add_trace(go.Scatter(
+        x=[position[n["tag"]][0] for n in nodes],
+        y=[position[n["tag"]][1] for n in nodes],
+        mode="markers+text",
+        text=[n["name"] + (" …" if n.get("truncated") else "") for n in nodes],
+        textposition="top center",
+        customdata=[n["tag"] for n in nodes],
+        hovertemplate="%{text}<br>%{customdata}<extra></extra>",
+        marker=dict(size=12, color=["crimson"] + ["steelblue"] * (len(nodes) - 1)),
+    ))
+    fig.update_layout(showlegend=False, margin=dict(l=20, r=20, t=20, b=20), height=400)
+    fig.update_xaxes(title="steps upstream / downstream", dtick=1, zeroline=False)
+    fig.update_yaxes(visible=False)
+    return fig
+
 
 def layout(tag=None, **kwargs):
-    events = db.get_events()
-    options = [
-        {"label": e["name"], "value": e["tag"]} for e in events
-    ]
+    # Only the current event is embedded; other options are searched on demand
+    options = picker_options(None, tag, limit=0)
     event = db.get_event_by_tag(tag) if tag else None
     selector = html.Div(
         [
@@ -20,6 +66,7 @@ def layout(tag=None, **kwargs):
                 options=options,
                 value=tag,
                 clearable=False,
+                placeholder="Type to search events",
             ),
             # allow navigating between event details without a page reload
             dcc.Location(id="event-detail-nav", refresh="callback-nav"),
@@ -38,6 +85,26 @@ def layout(tag=None, **kwargs):
             for t in tags
         ]
 
+    def make_chain(chain):
+        if not chain:
+            return [html.Div("None")]
+        steps = {}
+        for node in chain:
+            steps.setdefault(node["depth"], []).append(node)
+        return [
+            html.Div([
+                html.Em(f"{depth} step{'s' if depth > 1 else ''}: "),
+                *[dcc.Link(n["name"] + (" (more links not shown)" if n["truncated"] else ""),
+                           href=f"/event_detail?tag={n['tag']}", style={"marginRight": "10px"})
+                  for n in nodes],
+            ])
+            for depth, nodes in steps.items()
+        ]
+
+    # Both chains come from two recursive queries, however long they are
+    upstream = db.get_causal_chain(tag, "upstream", CHAIN_MAX_DEPTH, CHAIN_MAX_FANOUT)
+    downstream = db.get_causal_chain(tag, "downstream", CHAIN_MAX_DEPTH, CHAIN_MAX_FANOUT)
+
     return html.Div([
         selector,
         html.H2(event.get("name", "")),
@@ -50,16 +117,41 @@ def layout(tag=None, **kwargs):
             html.Li(f"Description: {event.get('description', '')}"),
         ]),
         html.Div([html.Strong("Affected by: "), *make_links(event.get('affected_by'))]),
-        html.Div([html.Strong("Affects: "), *make_links(event.get('affects'))])
+        html.Div([html.Strong("Affects: "), *make_links(event.get('affects'))]),
+        html.H3("Causal chain"),
+        html.Div([html.Strong("Upstream:"), *make_chain(upstream)]),
+        html.Div([html.Strong("Downstream:"), *make_chain(downstream)]),
+        dcc.Graph(id="causal-graph",
+                  figure=causal_graph_figure(event, upstream, downstream)),
     ], style={"marginLeft": "40px", "marginRight": "40px", "maxWidth": "800px"})
 
 
+register_event_picker("event-detail-select")
+
+
 @callback(
     Output("event-detail-nav", "href", allow_duplicate=True),
     Input("event-detail-select", "value"),
     prevent_initial_call=True,
 )
+@instrument("callback")
 def change_event(selected):
     if not selected:
         return dash.no_update
     return f"/event_detail?tag={selected}"
+
+
+@callback(
+    Output("event-detail-nav", "href", allow_duplicate=True),
+    Input("causal-graph", "clickData"),
+    prevent_initial_call=True,
+)
+@instrument("callback")
+def go_to_linked_event(click_data):
+    """Open the detail page of a clicked node in the causal graph."""
+    if not click_data or "points" not in click_data:
+        return dash.no_update
+    tag = click_data["points"][0].get("customdata")
+    if not tag:
+        return dash.no_update
+    return f"/event_detail?tag={tag}"
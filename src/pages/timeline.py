@@ -1,13 +1,19 @@
+import os
 import dash
-from dash import html, dcc, callback, Input, Output, State
-import plotly.express as px
+from dash import html, dcc, callback, clientside_callback, ClientsideFunction, Input, Output, State
+import numpy as np
 import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.colors import qualitative
 from datetime import datetime
 from flags import get_flag
+from figure_cache import FigureCache
+from metrics import instrument
 import dash_mantine_components as dmc
 import db
 # 4) add one scatter trace per category for instant events
 from collections import defaultdict
+import heapq
 
 dash.register_page(__name__, path="/", name="Timeline")
 
@@ -23,8 +29,92 @@ CATEGORY_PATTERN = {
     # "\\" (diagonal lines)
     # "*" (asterisk)
 }
+# WebGL counterparts of CATEGORY_PATTERN (line traces cannot be hatched)
+CATEGORY_LINE_DASH = {"Politics": "solid", "Science": "dot", "Culture": "dash", "War": "dashdot"}
+# Above this many events the figure is drawn with WebGL traces instead of SVG
+WEBGL_THRESHOLD = int(os.environ.get("TIMELINE_WEBGL_THRESHOLD", "1000"))
+BAR_WIDTH = 12
+HOVER_TEMPLATE = (
+    "<b>%{customdata[1]}</b><br>category=%{customdata[2]}<br>topic=%{customdata[3]}"
+    "<br>country=%{customdata[4]}<br>date_start=%{customdata[5]}"
+    "<br>date_end=%{customdata[6]}<br>description=%{customdata[7]}<extra></extra>"
+)
+# Filter option label for events that leave the category or country blank
+EMPTY_LABEL = "(none)"
+# Engine behind filter_events/assign_rows: "python" loops over the event dicts,
+# "columnar" works on NumPy arrays. Both produce identical results.
+ENGINES = ("python", "columnar")
+TIMELINE_ENGINE = os.environ.get("TIMELINE_ENGINE", "python")
+# Largest figure that still draws country flags as individual annotations
+FLAG_ANNOTATION_LIMIT = int(os.environ.get("TIMELINE_FLAG_ANNOTATION_LIMIT", "50"))
+# Above this many events in view the timeline shows a binned density summary
+LOD_MAX_BARS = int(os.environ.get("TIMELINE_LOD_MAX_BARS", "2000"))
+LOD_BINS = int(os.environ.get("TIMELINE_LOD_BINS", "200"))
+# Ship a columnar snapshot to the browser and filter there instead of calling
+# update_timeline. Suited to datasets that fit comfortably in the browser.
+CLIENT_FILTERING = os.environ.get("TIMELINE_CLIENT_FILTERING", "").lower() in ("1", "true", "yes")
+# How often (ms) the browser asks whether the data version has changed
+SNAPSHOT_POLL_MS = int(os.environ.get("TIMELINE_SNAPSHOT_POLL_MS", "30000"))
+# Rendered figures are reused while the filters and the data are unchanged
+_figure_cache = FigureCache(
+    max_entries=int(os.environ.get("TIMELINE_FIGURE_CACHE_ENTRIES", "32")),
+    max_bytes=int(os.environ.get("TIMELINE_FIGURE_CACHE_BYTES", str(64 * 1024 * 1024))),
+)
+
+class EventColumns:
+    """Columnar view of a list of events: datetime64 start/end arrays and
+    categorical codes for category and country."""
+
+    def __init__(self, events):
+        # pandas is only needed by the columnar engine, so it is not imported at startup
+        import pandas as pd
+
+        self.events = events
+        self.starts = np.array([ev["date_start"] for ev in events], dtype="datetime64[s]")
+        self.ends = np.array([ev["date_end"] or ev["date_start"] for ev in events],
+                             dtype="datetime64[s]")
+        self.category = pd.Categorical([ev["category"] for ev in events])
+        self.country = pd.Categorical([ev["country"] for ev in events])
+
+    @staticmethod
+    def _isin(values, wanted):
+        codes = [values.categories.get_loc(v) for v in wanted if v in values.categories]
+        return np.isin(values.codes, codes)
+
+    def mask(self, categories=None, countries=None, start_date=None, end_date=None):
+        """Boolean mask of the events matching the filters."""
+        keep = np.ones(len(self.events), dtype=bool)
+        if categories:
+            keep &= self._isin(self.category, categories)
+        if countries:
+            keep &= self._isin(self.country, countries)
+        if start_date:
+            keep &= self.ends >= np.datetime64(start_date, "s")
+        if end_date:
+            keep &= self.starts <= np.datetime64(end_date, "s")
+        return keep
+
 # Helper function to filter events based on selected criteria
-def filter_events(events, categories=None, countries=None, start_date=None, end_date=None):
+@instrument("timeline")
+def filter_events(events, categories=None, countries=None, start_date=None, end_date=None,
+                  engine=None):
+    """Return the events matching the filters, using ``engine`` (default
+    ``TIMELINE_ENGINE``)."""
+    if (engine or TIMELINE_ENGINE) == "columnar":
+        return _filter_events_columnar(events, categories, countries, start_date, end_date)
+    return _filter_events_python(events, categories, countries, start_date, end_date)
+
+def _filter_events_columnar(events, categories, countries, start_date, end_date):
+    if categories is not None and len(categories) == 0:
+        return []
+    if countries is not None and len(countries) == 0:
+        return []
+    if not events:
+        return []
+    keep = EventColumns(events).mask(categories, countries, start_date, end_date)
+    return [events[i] for i in np.flatnonzero(keep)]
+
+def _filter_events_python(events, categories=None, countries=None, start_date=None, end_date=None):
     filtered = []
     # If an empty list is provided for categories or countries, interpret as "no events"
     if categories is not None and len(categories) == 0:
@@ -51,11 +141,68 @@ def filter_events(events, categories=None, countries=None, start_date=None, end_
         filtered.append(ev)
     return filtered
 
-def assign_rows(events):
+def pack_lanes(spans):
+    """Partition ``(start, end)`` spans, sorted by start, into non-overlapping slots.
+
+    Each span takes the lowest-numbered slot whose previous span ended at or
+    before its start (first fit), found through two heaps in O(n log n).
+    Returns the slot index of every span and the number of slots used.
+    """
+    busy: list[tuple] = []  # (end, slot) of occupied slots
+    free: list[int] = []    # indices of slots whose span has ended
+    slot_indices: list[int] = []
+    slot_count = 0
+    for start, end in spans:
+        while busy and busy[0][0] <= start:
+            heapq.heappush(free, heapq.heappop(busy)[1])
+        if free:
+            slot = heapq.heappop(free)
+        else:
+            slot = slot_count
+            slot_count += 1
+        heapq.heappush(busy, (end, slot))
+        slot_indices.append(slot)
+    return slot_indices, slot_count
+
+@instrument("timeline")
+def assign_rows(events, engine=None):
     """Assign each event a row identifier so that events within the same
     ``(category, country, topic)`` group that do not overlap in time share a row.
 
     Returns two lists: the ordered row identifiers and the labels for display."""
+    if (engine or TIMELINE_ENGINE) == "columnar":
+        return _assign_rows_columnar(events)
+    return _assign_rows_python(events)
+
+def _assign_rows_columnar(events):
+    row_order: list[str] = []
+    row_labels: list[str] = []
+    if not events:
+        return row_order, row_labels
+    cols = EventColumns(events)
+    starts = cols.starts.astype(np.int64)
+    ends = cols.ends.astype(np.int64)
+    cat_codes = cols.category.codes
+    country_codes = cols.country.codes
+    # Group by (category, country) in sorted order, then by start; lexsort is
+    # stable so ties keep their input order like the dict implementation
+    order = np.lexsort((starts, country_codes, cat_codes))
+    group_key = cat_codes[order].astype(np.int64) * len(cols.country.categories) + country_codes[order]
+    bounds = np.flatnonzero(np.diff(group_key)) + 1
+    for group in np.split(order, bounds):
+        key = (cols.category.categories[cat_codes[group[0]]],
+               cols.country.categories[country_codes[group[0]]])
+        label = "<br>".join(key)
+        prefix = f"{key[0]}|{key[1]}_"
+        slot_indices, slot_count = pack_lanes(zip(starts[group].tolist(), ends[group].tolist()))
+        for i, slot_index in zip(group.tolist(), slot_indices):
+            events[i]["row_id"] = f"{prefix}{slot_index}"
+        # Slots are opened in index order, so that is also their first-use order
+        row_order.extend(f"{prefix}{idx}" for idx in range(slot_count))
+        row_labels.extend([label] * slot_count)
+    return row_order, row_labels
+
+def _assign_rows_python(events):
 
     grouped: dict[tuple[str, str], list[dict]] = defaultdict(list)
     for ev in events:
@@ -68,39 +215,157 @@ def assign_rows(events):
     for key in sorted(grouped):
         label = "<br>".join(key)
         evs = sorted(grouped[key], key=lambda e: e["date_start"])
-
-        # ``slots`` holds the end time of the last event occupying each slot
-        slots: list[datetime] = []
-
+        spans = []
         for ev in evs:
             start_dt = datetime.fromisoformat(ev["date_start"])
             end_dt = (
                 datetime.fromisoformat(ev["date_end"])
                 if ev["date_end"] else start_dt
             )
+            spans.append((start_dt, end_dt))
 
-            slot_index: int | None = None
-            for idx, last_end in enumerate(slots):
-                if start_dt >= last_end:
-                    slot_index = idx
-                    slots[idx] = end_dt
-                    break
+        slot_indices, slot_count = pack_lanes(spans)
+        for ev, slot_index in zip(evs, slot_indices):
+            ev["row_id"] = f"{key[0]}|{key[1]}_{slot_index}"
+        # Slots are opened in index order, so that is also their first-use order
+        row_order.extend(f"{key[0]}|{key[1]}_{idx}" for idx in range(slot_count))
+        row_labels.extend([label] * slot_count)
 
-            if slot_index is None:
-                slot_index = len(slots)
-                slots.append(end_dt)
+    return row_order, row_labels
 
-            row_id = f"{key[0]}|{key[1]}_{slot_index}"
-            ev["row_id"] = row_id
+def _mid_points(events):
+    """Vectorised midpoints of the event bars (instants sit at their start)."""
+    starts = np.array([ev["date_start"] for ev in events], dtype="datetime64[s]")
+    ends = np.array([ev["date_end"] or ev["date_start"] for ev in events], dtype="datetime64[s]")
+    return starts + (ends - starts) // 2
 
-            if row_id not in row_order:
-                row_order.append(row_id)
-                row_labels.append(label)
+def add_flag_annotations(fig, events):
+    """Draw each country flag as its own annotation; fine for small figures."""
+    flagged = [ev for ev in events if get_flag(ev["country"])]
+    if not flagged:
+        return
+    for ev, mid in zip(flagged, _mid_points(flagged).tolist()):
+        fig.add_annotation(
+            x=mid,
+            y=ev["row_id"],
+            text=get_flag(ev["country"]),
+            showarrow=False,
+            xanchor="center",
+            yanchor="middle",
+        )
 
-    return row_order, row_labels
+def add_flag_traces(fig, events, webgl=False):
+    """Draw the country flags as one text trace per category."""
+    trace = go.Scattergl if webgl else go.Scatter
+    bucket = defaultdict(list)
+    for ev in events:
+        if get_flag(ev["country"]):
+            bucket[ev["category"]].append(ev)
+    for cat, ev_list in bucket.items():
+        fig.add_trace(trace(
+            x=_mid_points(ev_list),
+            y=[e["row_id"] for e in ev_list],
+            text=[get_flag(e["country"]) for e in ev_list],
+            mode="text",
+            textposition="middle center",
+            hoverinfo="skip",
+            name=f"{cat} (flags)",
+            showlegend=False,
+        ))
+
+def add_causal_arrows(fig, events, row_index):
+    """Draw the causal links between ``events`` as batched traces.
+
+    Each link is a horizontal segment along the source row (from the source
+    end to the target start) and a vertical segment down or up to the target
+    row. All horizontal segments share one line trace, all vertical segments
+    another, with ``None`` gaps between them. One marker trace draws the
+    arrowheads. The tail is never drawn after the target start, so arrows
+    never point backwards in time.
+    """
+    by_tag = {e["tag"]: e for e in events}
+    h_x, h_y, v_x, v_y = [], [], [], []
+    head_x, head_y, head_symbol = [], [], []
+    for ev in events:
+        src_row = ev["row_id"]
+        source_end_date = ev["date_end"] if ev["date_end"] else ev["date_start"]
+        for tgt_tag in db.split_tags(ev["affects"]):
+            target_event = by_tag.get(tgt_tag)
+            if not target_event:
+                continue  # target event not in current filtered list
+            target_start_date = target_event["date_start"]
+            tgt_row = target_event["row_id"]
+            # If source extends beyond target start, align at target start to avoid backward arrow
+            x_tail = min(source_end_date, target_start_date)
+            if x_tail < target_start_date:
+                h_x += [x_tail, target_start_date, None]
+                h_y += [src_row, src_row, None]
+            if tgt_row != src_row:
+                v_x += [target_start_date, target_start_date, None]
+                v_y += [src_row, tgt_row, None]
+            head_x.append(target_start_date)
+            head_y.append(tgt_row)
+            # The y axis is reversed, so later rows are drawn further down
+            if tgt_row == src_row:
+                head_symbol.append("triangle-right")
+            elif row_index[tgt_row] > row_index[src_row]:
+                head_symbol.append("triangle-down")
+            else:
+                head_symbol.append("triangle-up")
+    if not head_x:
+        return
+    line = dict(color="black", width=1)
+    for x, y in ((h_x, h_y), (v_x, v_y)):
+        if x:
+            fig.add_scatter(x=x, y=y, mode="lines", line=line, hoverinfo="skip",
+                            name="causal links", showlegend=False)
+    fig.add_scatter(x=head_x, y=head_y, mode="markers", hoverinfo="skip",
+                    marker=dict(symbol=head_symbol, size=8, color="black"),
+                    name="causal links", showlegend=False)
+
+def _hover_fields(ev):
+    """``customdata`` for WebGL traces; the tag comes first for ``go_to_detail``."""
+    return [ev["tag"], ev["name"], ev["category"], ev["topic"], ev["country"],
+            ev["date_start"], ev["date_end"], ev["description"]]
+
+def add_webgl_bars(fig, events):
+    """Draw event bars as thick ``Scattergl`` line segments, one trace per category.
 
-# Helper function to create a Plotly timeline figure (adds arrows if show_arrows=True)
-def make_timeline_figure(events, show_arrows=False):
+    Colours follow the template colorway ``px.timeline`` would use and
+    categories get the line dash closest to their SVG fill pattern.
+    """
+    template = pio.templates[pio.templates.default]
+    palette = template.layout.colorway or qualitative.Plotly
+    bucket = defaultdict(list)
+    for ev in events:
+        bucket[ev["category"]].append(ev)
+    # Insertion order matches first appearance, which is how px assigns colours
+    for idx, (cat, ev_list) in enumerate(bucket.items()):
+        colour = palette[idx % len(palette)]
+        x, y, custom = [], [], []
+        for ev in ev_list:
+            if not ev["date_end"]:
+                continue  # instants are drawn as diamonds
+            fields = _hover_fields(ev)
+            x += [ev["date_start"], ev["date_end"], None]
+            y += [ev["row_id"], ev["row_id"], None]
+            custom += [fields, fields, None]
+        fig.add_trace(go.Scattergl(
+            x=x, y=y, customdata=custom,
+            mode="lines",
+            line=dict(color=colour, width=BAR_WIDTH, dash=CATEGORY_LINE_DASH.get(cat, "solid")),
+            marker=dict(color=colour),
+            hovertemplate=HOVER_TEMPLATE,
+            name=cat,
+            legendgroup=cat,
+        ))
+
+# Helper function to create a Plotly timeline figure (adds arrows if show_arrows=True).
+# ``flag_mode`` is "annotations", "trace" or "auto" (annotations up to
+# FLAG_ANNOTATION_LIMIT events, one text trace per category beyond that).
+# ``render_mode`` is "svg", "webgl" or "auto" (WebGL above WEBGL_THRESHOLD events).
+@instrument("timeline")
+def make_timeline_figure(events, show_arrows=False, flag_mode="auto", render_mode="auto"):
     if not events:
         # Return an empty figure with a message if no events to display
         fig = go.Figure()
@@ -109,43 +374,41 @@ def make_timeline_figure(events, show_arrows=False):
         return fig
     # Sort events by category and start date for logical grouping
     row_order, row_labels = assign_rows(events)
-    events_sorted = sorted(events, key=lambda e: (row_order.index(e["row_id"]), e["date_start"]))    
-
-    fig = px.timeline(
-        events_sorted,
-        x_start="date_start", x_end="date_end", y="row_id", color="category",
-        hover_name="name",
-        hover_data={"category": True, "topic": True, "country": True,
-                    "date_start": True, "date_end": True, "description": True},
-        custom_data=["tag"]
+    row_index = {row_id: idx for idx, row_id in enumerate(row_order)}
+    events_sorted = sorted(events, key=lambda e: (row_index[e["row_id"]], e["date_start"]))    
+
+    webgl = render_mode == "webgl" or (
+        render_mode == "auto" and len(events_sorted) > WEBGL_THRESHOLD
     )
-    # Style bars differently for each category
-    line_styles = {"Politics": "solid", "Science": "dot", "Culture": "dash"}
-    for tr in fig.data:
-        pattern = CATEGORY_PATTERN.get(tr.name, "")
-        if pattern:
-            tr.marker.pattern.shape = pattern
-
-
-    # Add small flag annotations centered on each event bar
-    def mid_point(start: str, end: str | None) -> datetime:
-        start_dt = datetime.fromisoformat(start)
-        end_dt = datetime.fromisoformat(end) if end else start_dt
-        return start_dt + (end_dt - start_dt) / 2
-
-    # Add small flag annotations based on country
-    flag_emojis = {"USA": "🇺🇸", "Germany": "🇩🇪", "Global": "🌐", "Israel": ""}
-    for ev in events_sorted:
-        flag = get_flag(ev["country"])
-        if flag:
-            fig.add_annotation(
-                x=mid_point(ev["date_start"], ev["date_end"]),
-                y=ev["row_id"],
-                text=flag,
-                showarrow=False,
-                xanchor="center",
-                yanchor="middle",
-            )
+    if webgl:
+        fig = go.Figure()
+        add_webgl_bars(fig, events_sorted)
+    else:
+        # plotly.express pulls in pandas; import it on the first SVG render
+        import plotly.express as px
+
+        fig = px.timeline(
+            events_sorted,
+            x_start="date_start", x_end="date_end", y="row_id", color="category",
+            hover_name="name",
+            hover_data={"category": True, "topic": True, "country": True,
+                        "date_start": True, "date_end": True, "description": True},
+            custom_data=["tag"]
+        )
+        # Style bars differently for each category
+        for tr in fig.data:
+            pattern = CATEGORY_PATTERN.get(tr.name, "")
+            if pattern:
+                tr.marker.pattern.shape = pattern
+
+
+    # Add small flag markers centered on each event bar
+    if flag_mode == "annotations" or (
+        flag_mode == "auto" and len(events_sorted) <= FLAG_ANNOTATION_LIMIT
+    ):
+        add_flag_annotations(fig, events_sorted)
+    else:
+        add_flag_traces(fig, events_sorted, webgl=webgl)
     points = [e for e in events if not e["date_end"]]
     # 3) grab the colour that Plotly just used for every category
     cat_colour = {tr.name: tr.marker.color for tr in fig.data}
@@ -156,6 +419,18 @@ def make_timeline_figure(events, show_arrows=False):
         bucket[ev["category"]].append(ev)
 
     for cat, ev_list in bucket.items():
+        if webgl:
+            fig.add_trace(go.Scattergl(
+                x=[e["date_start"] for e in ev_list],
+                y=[e["row_id"] for e in ev_list],
+                mode="markers",
+                marker=dict(symbol="diamond", size=10, color=cat_colour.get(cat, "black")),
+                customdata=[_hover_fields(e) for e in ev_list],
+                hovertemplate=HOVER_TEMPLATE,
+                name=f"{cat} (instant)",
+                showlegend=False,
+            ))
+            continue
         fig.add_scatter(
             x=[e["date_start"] for e in ev_list],
             y=[e["row_id"]        for e in ev_list],
@@ -183,45 +458,179 @@ def make_timeline_figure(events, show_arrows=False):
     fig.update_xaxes(rangeslider_visible=True)
     # Add arrows for causal links if toggled on
     if show_arrows:
-        tag_to_row = {e["tag"]: e["row_id"] for e in events}
-        for ev in events:
-            src_row = tag_to_row.get(ev["tag"])
-            if ev["affects"]:
-                # For each target tag that this event affects
-                targets = [t.strip() for t in ev["affects"].split(",") if t.strip()]
-                for tgt_tag in targets:
-                    target_event = next((e for e in events if e["tag"] == tgt_tag), None)
-                    if not target_event:
-                        continue  # target event not in current filtered list
-                    # Define arrow endpoints
-                    source_end_date = ev["date_end"] if ev["date_end"] else ev["date_start"]
-                    target_start_date = target_event["date_start"]
-                    # Determine horizontal arrow segment start point
-                    x_tail = source_end_date
-                    if source_end_date > target_start_date:
-                        # If source extends beyond target start, align at target start to avoid backward arrow
-                        x_tail = target_start_date
-                    # Draw horizontal segment (no arrowhead) if there's a gap between source end and target start
-                    if x_tail < target_start_date and src_row is not None:
-                        fig.add_annotation(x=target_start_date, y=src_row,
-                                           ax=x_tail, ay=src_row,
-                                           xref="x", yref="y", axref="x", ayref="y",
-                                           showarrow=True, arrowhead=0, arrowwidth=1, arrowcolor="black", text="")
-                    # Draw vertical arrow segment from source to target at the target start time
-                    fig.add_annotation(x=target_start_date, y=tag_to_row.get(tgt_tag),
-                                       ax=target_start_date, ay=src_row,
-                                       xref="x", yref="y", axref="x", ayref="y",
-                                       showarrow=True, arrowhead=3, arrowwidth=1, arrowcolor="black", text="")
+        add_causal_arrows(fig, events, row_index)
     return fig
 
-def layout():
-    """Render the timeline page with the latest data."""
+def figure_cache_stats():
+    """Hit/miss counters of the timeline figure cache."""
+    return _figure_cache.stats()
+
+def _normalize(values):
+    return None if values is None else tuple(sorted(values))
+
+def viewport_range(relayout):
+    """Return the visible ``(start, end)`` dates from ``relayoutData``.
+
+    Returns ``None`` when the x axis shows everything (initial render or
+    autorange reset).
+    """
+    if not relayout or relayout.get("xaxis.autorange"):
+        return None
+    if "xaxis.range[0]" in relayout and "xaxis.range[1]" in relayout:
+        bounds = relayout["xaxis.range[0]"], relayout["xaxis.range[1]"]
+    elif "xaxis.range" in relayout:
+        bounds = relayout["xaxis.range"]
+    else:
+        return None
+    # Plotly reports datetimes such as "1950-03-12 04:33:12.5"; days suffice
+    return str(bounds[0])[:10], str(bounds[1])[:10]
+
+def x_axis_changed(relayout):
+    """Whether ``relayoutData`` describes a zoom, pan or reset of the x axis."""
+    return bool(relayout) and any(k.startswith("xaxis.range") or k == "xaxis.autorange"
+                                  for k in relayout)
+
+@instrument("timeline")
+def make_density_figure(density, start, end, bins):
+    """Heatmap of binned event counts per ``(category, country)`` row."""
+    labels = sorted({(cat, country) for cat, country, _, _ in density})
+    row_of = {key: idx for idx, key in enumerate(labels)}
+    counts = np.zeros((len(labels), bins), dtype=np.int64)
+    for cat, country, bin_index, count in density:
+        counts[row_of[(cat, country)], bin_index] += count
+    start64 = np.datetime64(start, "s")
+    width = (np.datetime64(end, "s") - start64) / bins
+    centers = start64 + width * (np.arange(bins) + 0.5)
+    fig = go.Figure(go.Heatmap(
+        x=centers,
+        y=["<br>".join(key) for key in labels],
+        z=counts,
+        colorscale="Blues",
+        hovertemplate="%{y}<br>%{x}: %{z} events<extra></extra>",
+        colorbar=dict(title="Events"),
+    ))
+    fig.update_yaxes(autorange="reversed")
+    fig.update_layout(title="Zoom in to see individual events",
+                      margin=dict(l=100, r=20, t=40, b=40))
+    fig.update_xaxes(type="date", rangeslider_visible=True)
+    return fig
+
+@instrument("timeline")
+def cached_timeline_figure(categories=None, countries=None, start_date=None, end_date=None,
+                           show_arrows=False, viewport=None, search=None):
+    """Return the timeline figure for the given filters, reusing cached renders.
+
+    ``search`` is free text matched against names, topics and descriptions
+    through the full-text index and combined with the other filters.
+
+    ``viewport`` is the visible ``(start, end)`` range; only events in it are
+    drawn. When more than ``LOD_MAX_BARS`` events are in view, a density
+    summary is drawn instead, so the payload stays bounded however large the
+    database is. The cache key combines the normalized filters, the viewport,
+    the arrows flag and the database data version, so any write invalidates
+    earlier figures. The figure is returned as a plain dict, whether it was
+    cached or just built.
+    """
+    search = db.fts_query(search)
+    key = (_normalize(categories), _normalize(countries), start_date or None,
+           end_date or None, bool(show_arrows), viewport, search, db.data_version())
+    figure = _figure_cache.get(key)
+    if figure is not None:
+        return figure
+    window_start, window_end = start_date or None, end_date or None
+    if viewport:
+        window_start = max(filter(None, (window_start, viewport[0])))
+        window_end = min(filter(None, (window_end, viewport[1])))
+    count = db.count_events(categories, countries, window_start, window_end, search)
+    if count > LOD_MAX_BARS:
+        low, high = db.date_bounds(categories, countries, search)
+        window_start = window_start or low
+        window_end = window_end or high
+        density = db.event_density(categories, countries, window_start, window_end, LOD_BINS,
+                                   search)
+        figure = make_density_figure(density, window_start, window_end, LOD_BINS)
+    else:
+        events = db.query_events(categories=categories, countries=countries,
+                                 start=window_start, end=window_end, search=search)
+        figure = make_timeline_figure(events, show_arrows=show_arrows)
+    if viewport:
+        figure.update_xaxes(range=list(viewport))
+    # Serialized once here; callers always get the plain dict form
+    return _figure_cache.put(key, figure)
+
+_snapshot = (None, None)
+
+def version_token():
+    """JSON-friendly form of ``db.data_version()``."""
+    return "|".join(map(str, db.data_version()))
+
+def timeline_snapshot():
+    """Compact columnar snapshot of all events for client-side filtering.
+
+    Rows are assigned over the full dataset, so filtering in the browser only
+    hides events and never repacks rows. Categories and countries are sent as
+    codes into the ``categories``/``countries`` lists, and links as index pairs.
+    Colours come from ``palette`` in order of first appearance among the
+    visible events sorted by row and start date, matching the server-rendered
+    figure. Built once per data version.
+    """
+    global _snapshot
+    version = version_token()
+    if _snapshot[0] == version:
+        return _snapshot[1]
     events = db.get_events()
+    row_order, row_labels = assign_rows(events)
+    row_index = {row_id: idx for idx, row_id in enumerate(row_order)}
     categories = sorted({ev["category"] for ev in events})
     countries = sorted({ev["country"] for ev in events})
-    min_date = min(ev["date_start"] for ev in events)
-    max_date = max((ev["date_end"] if ev["date_end"] else ev["date_start"]) for ev in events)
-    initial_fig = make_timeline_figure(events, show_arrows=False)
+    cat_code = {c: i for i, c in enumerate(categories)}
+    country_code = {c: i for i, c in enumerate(countries)}
+    tag_index = {ev["tag"]: i for i, ev in enumerate(events)}
+    template = pio.templates[pio.templates.default]
+    palette = template.layout.colorway or qualitative.Plotly
+    snapshot = {
+        "version": version,
+        "categories": categories,
+        "countries": countries,
+        # Assigned in the browser by first appearance, as in make_timeline_figure
+        "palette": list(palette),
+        "hover": HOVER_TEMPLATE,
+        "dashes": [CATEGORY_LINE_DASH.get(c, "solid") for c in categories],
+        "flags": [get_flag(c) for c in countries],
+        "rows": row_order,
+        "row_labels": row_labels,
+        "tag": [ev["tag"] for ev in events],
+        "name": [ev["name"] for ev in events],
+        "topic": [ev["topic"] for ev in events],
+        "description": [ev["description"] for ev in events],
+        "category": [cat_code[ev["category"]] for ev in events],
+        "country": [country_code[ev["country"]] for ev in events],
+        "start": [ev["date_start"] for ev in events],
+        "end": [ev["date_end"] for ev in events],
+        "row": [row_index[ev["row_id"]] for ev in events],
+        "links": [[i, tag_index[t]] for i, ev in enumerate(events)
+                  for t in db.split_tags(ev["affects"]) if t in tag_index],
+    }
+    _snapshot = (version, snapshot)
+    return snapshot
+
+def layout():
+    """Render the timeline page with the latest data."""
+    # Blank values stay selectable, or events without a country would vanish
+    facets = db.get_facets(include_empty=True)
+    categories = facets["categories"]
+    countries = facets["countries"]
+    min_date, max_date = db.date_bounds()
+    # The page arrives with its figure, so update_timeline skips its initial
+    # call; in client mode the browser draws the figure from the snapshot
+    initial_fig = {} if CLIENT_FILTERING else cached_timeline_figure(
+        categories, countries, min_date, max_date)
+    client_stores = [
+        dcc.Store(id="timeline-snapshot", data=timeline_snapshot()),
+        dcc.Store(id="timeline-version", data=version_token()),
+        dcc.Store(id="timeline-search-matches", data=None),
+        dcc.Interval(id="timeline-version-poll", interval=SNAPSHOT_POLL_MS),
+    ] if CLIENT_FILTERING else []
 
     return html.Div([
         html.H2("Timeline View"),
@@ -230,14 +639,21 @@ def layout():
             html.Label("Category:"),
             dcc.Dropdown(
             id="filter-category",
-            options=[{"label": cat, "value": cat} for cat in categories],
+            options=[{"label": cat or EMPTY_LABEL, "value": cat} for cat in categories],
             value=categories,  # default select all categories
             multi=True
         ),
+        html.Label(" Search:", className="filter-spacing"),
+        dmc.TextInput(
+            id="filter-search",
+            placeholder="Search names and descriptions",
+            value="",
+            debounce=300,
+        ),
         html.Label(" Country:", className="filter-spacing"),
         dcc.Dropdown(
             id="filter-country",
-            options=[{"label": c, "value": c} for c in countries],
+            options=[{"label": c or EMPTY_LABEL, "value": c} for c in countries],
             value=countries,  # default select all countries
             multi=True
         ),
@@ -261,7 +677,8 @@ def layout():
         html.Label(" ", className="filter-spacing"),  # spacer
         dcc.Checklist(
             id="toggle-arrows",
-            options=[{"label": "Show causal links", "value": "show"}],
+            options=[{"label": "Show causal links", "value": "show"}] + ([] if CLIENT_FILTERING else [
+                {"label": "Highlight what a clicked event leads to", "value": "highlight"}]),
             value=[],  # unchecked by default (no arrows)
             className="checklist"
         )
@@ -271,47 +688,127 @@ def layout():
     # hidden location for navigating to event detail when a point is clicked
     # use callback-nav refresh mode so the new page loads without a full refresh
     dcc.Location(id="event-detail-nav", href="", refresh="callback-nav"),
+    *client_stores,
 ], className="page-container")
 
+def highlight_events(figure, tags):
+    """Dim every event of ``figure`` whose tag is not in ``tags``.
+
+    Traces carrying tags in ``customdata`` get ``selectedpoints``, which Plotly
+    renders by fading the unselected points; links and flags are untouched.
+    """
+    if not isinstance(figure, dict):
+        figure = figure.to_dict()
+    for trace in figure["data"]:
+        custom = trace.get("customdata")
+        if custom is None:
+            continue
+        trace["selectedpoints"] = [i for i, c in enumerate(custom)
+                                   if c is not None and c[0] in tags]
+    return figure
+
+def clicked_tag(click_data):
+    """Tag of the event behind a ``clickData`` point, if any."""
+    if not click_data or "points" not in click_data:
+        return None
+    custom = click_data["points"][0].get("customdata")
+    return custom[0] if custom else None
+
 # Callback to update the timeline graph when filters or arrow toggle change
-@callback(
-    Output("timeline-graph", "figure"),
-    Input("filter-category", "value"),
-    Input("filter-country", "value"),
-    Input("apply-filters", "n_clicks"),
-    Input("toggle-arrows", "value"),
-    State("filter-date-start", "value"),
-    State("filter-date-end", "value"),
-)
-def update_timeline(selected_categories, selected_countries, apply_filters, arrows_toggle, start_date, end_date, ):
-    # Load the latest events (including any newly added events)
-    events = db.get_events()
-    # Apply filters
-    filtered_events = filter_events(events,
-                                    categories=selected_categories,
-                                    countries=selected_countries,
-                                    start_date=start_date,
-                                    end_date=end_date)
+# (registered below unless client-side filtering is enabled)
+def update_timeline(selected_categories, selected_countries, apply_filters, arrows_toggle, relayout, search, click_data, start_date, end_date, ):
+    highlight = bool(arrows_toggle and "highlight" in arrows_toggle)
+    triggered = dash.ctx.triggered_prop_ids
+    # Ignore relayout events that do not move the x axis (autosize, drag mode, ...)
+    if "timeline-graph.relayoutData" in triggered and not x_axis_changed(relayout):
+        return dash.no_update
+    # Outside highlight mode a click navigates to the event instead
+    if "timeline-graph.clickData" in triggered and not highlight:
+        return dash.no_update
     # Determine whether to show arrows based on the toggle
     show_arrows = bool(arrows_toggle and "show" in arrows_toggle)
-    # Generate updated figure
-    fig = make_timeline_figure(filtered_events, show_arrows=show_arrows)
-    return fig
+    # SQLite applies the filters; identical requests are served from the cache
+    figure = cached_timeline_figure(selected_categories, selected_countries,
+                                    start_date, end_date, show_arrows,
+                                    viewport=viewport_range(relayout), search=search)
+    # In highlight mode a click marks the event and everything it leads to
+    tag = clicked_tag(click_data)
+    if highlight and tag:
+        figure = highlight_events(figure, {tag, *db.reachable_tags(tag)})
+    return figure
+
+def search_matches(search, version=None):
+    """Tags of the events matching ``search`` for the client-side filter (``None`` = all).
+
+    ``version`` is only an input so the matches are refreshed after writes.
+    """
+    if db.fts_query(search) is None:
+        return None
+    return [ev["tag"] for ev in db.query_events(search=search)]
+
+def refresh_snapshot(n_intervals, current_version):
+    """Send a new snapshot only when the data version has changed."""
+    version = version_token()
+    if current_version == version:
+        return dash.no_update, dash.no_update
+    return timeline_snapshot(), version
+
+if CLIENT_FILTERING:
+    # Filtering runs in assets/timeline_clientside.js; the server is only
+    # asked for a new snapshot when the data version changes
+    clientside_callback(
+        ClientsideFunction(namespace="timeline", function_name="render"),
+        Output("timeline-graph", "figure"),
+        Input("timeline-snapshot", "data"),
+        Input("filter-category", "value"),
+        Input("filter-country", "value"),
+        Input("apply-filters", "n_clicks"),
+        Input("toggle-arrows", "value"),
+        Input("timeline-search-matches", "data"),
+        State("filter-date-start", "value"),
+        State("filter-date-end", "value"),
+    )
+    # Full-text matching needs the FTS index, so only the matches are fetched
+    callback(
+        Output("timeline-search-matches", "data"),
+        Input("filter-search", "value"),
+        Input("timeline-version", "data"),
+    )(instrument("callback")(search_matches))
+    callback(
+        Output("timeline-snapshot", "data"),
+        Output("timeline-version", "data"),
+        Input("timeline-version-poll", "n_intervals"),
+        State("timeline-version", "data"),
+        prevent_initial_call=True,
+    )(instrument("callback")(refresh_snapshot))
+else:
+    callback(
+        Output("timeline-graph", "figure"),
+        Input("filter-category", "value"),
+        Input("filter-country", "value"),
+        Input("apply-filters", "n_clicks"),
+        Input("toggle-arrows", "value"),
+        Input("timeline-graph", "relayoutData"),
+        Input("filter-search", "value"),
+        Input("timeline-graph", "clickData"),
+        State("filter-date-start", "value"),
+        State("filter-date-end", "value"),
+        prevent_initial_call=True,
+    )(instrument("callback")(update_timeline))
 
 
 @callback(
     Output("event-detail-nav", "href", allow_duplicate=True),
     Input("timeline-graph", "clickData"),
+    State("toggle-arrows", "value"),
     prevent_initial_call=True,
 )
-def go_to_detail(click_data):
+@instrument("callback")
+def go_to_detail(click_data, toggles):
     """Navigate to the event detail page when a bar is clicked."""
-    if not click_data or "points" not in click_data:
-        return dash.no_update
-    point = click_data["points"][0]
-    custom = point.get("customdata")
-    tag = custom[0] if custom else None
-    if not tag:
+    tag = clicked_tag(click_data)
+    # In highlight mode the click highlights the event's descendants instead
+    if not tag or (toggles and "highlight" in toggles):
         return dash.no_update
     # Returning an href triggers a client side navigation
     return f"/event_detail?tag={tag}"
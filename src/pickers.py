@@ -0,0 +1,47 @@
+import os
+from dash import callback, Input, Output, State
+import db
+from metrics import instrument
+
+# Most matches returned to a search-as-you-type event picker
+PICKER_LIMIT = int(os.environ.get("EVENT_PICKER_LIMIT", "20"))
+
+
+def event_option(ev, value_key="tag"):
+    """Dropdown option for an event, labelled ``Name (tag)``."""
+    return {"label": f'{ev["name"]} ({ev["tag"]})', "value": ev[value_key]}
+
+
+def picker_options(search, selected, value_key="tag", limit=PICKER_LIMIT):
+    """Options for an event picker: the selected events plus the top matches.
+
+    Selected values are always included so they keep resolving to a label
+    while the user searches for something else.
+    """
+    if selected is None:
+        selected = []
+    elif not isinstance(selected, list):
+        selected = [selected]
+    options = [event_option(ev, value_key) for ev in db.get_event_labels(selected, value_key)]
+    if limit <= 0:
+        return options
+    chosen = {opt["value"] for opt in options}
+    for ev in db.match_events(search, limit):
+        if ev[value_key] not in chosen:
+            options.append(event_option(ev, value_key))
+    return options
+
+
+def register_event_picker(dropdown_id, value_key="tag"):
+    """Serve the options of ``dropdown_id`` from the server as the user types."""
+
+    @callback(
+        Output(dropdown_id, "options"),
+        Input(dropdown_id, "search_value"),
+        State(dropdown_id, "value"),
+    )
+    @instrument("callback", f"{dropdown_id}.options")
+    def update_options(search_value, value):
+        return picker_options(search_value, value, value_key)
+
+    return update_options
@@ -0,0 +1,80 @@
+"""Run the app with gunicorn: several worker processes, threads and compression.
+
+Usage: python src/serve.py --db /path/to/events.db --workers 4 --threads 8
+"""
+import os
+import argparse
+import multiprocessing
+
+
+def default_workers():
+    """One worker per CPU, or a single worker while metrics are recorded.
+
+    The metrics registry lives in each worker process, so with several
+    workers ``/metrics`` would only show the one that answers the scrape.
+    """
+    if "TIMELINE_WORKERS" in os.environ:
+        return int(os.environ["TIMELINE_WORKERS"])
+    import metrics
+    return 1 if metrics.ENABLED else multiprocessing.cpu_count()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the timeline app in production")
+    parser.add_argument("--db", help="Path to the database file (default: EVENTS_DB_FILE)")
+    parser.add_argument("--bind", default=os.environ.get("TIMELINE_BIND", "0.0.0.0:8050"),
+                        help="Address to listen on (default: 0.0.0.0:8050)")
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="Worker processes (default: number of CPUs, 1 with TIMELINE_METRICS)")
+    parser.add_argument("--threads", type=int,
+                        default=int(os.environ.get("TIMELINE_THREADS", "4")),
+                        help="Threads per worker (default: 4)")
+    parser.add_argument("--timeout", type=int, default=60,
+                        help="Seconds before a silent worker is restarted (default: 60)")
+    parser.add_argument("--no-preload", action="store_true",
+                        help="Import the app in every worker instead of once before forking")
+    parser.add_argument("--no-compress", action="store_true",
+                        help="Do not compress responses")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Both are read when db and app are imported, so set them first
+    if args.db:
+        os.environ["EVENTS_DB_FILE"] = args.db
+    if args.no_compress:
+        os.environ["TIMELINE_COMPRESS"] = "0"
+    else:
+        os.environ.setdefault("TIMELINE_COMPRESS", "1")
+
+    from gunicorn.app.base import BaseApplication
+    import db
+
+    # Create or migrate the schema once, before any worker starts. The pool is
+    # closed so no SQLite handle is inherited by the forked workers.
+    db.init_db()
+    db.close_pool()
+
+    class TimelineApplication(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": args.bind,
+                "workers": args.workers,
+                "threads": args.threads,
+                "worker_class": "gthread",
+                "timeout": args.timeout,
+                "preload_app": not args.no_preload,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app import server
+            return server
+
+    TimelineApplication().run()
+
+
+if __name__ == "__main__":
+    main()
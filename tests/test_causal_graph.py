@@ -0,0 +1,57 @@
+import random
+import sys
+sys.path.append('src')
+from causal_graph import CausalGraph
+import causal_graph
+
+
+def brute_force_descendants(n, edges):
+    children = {i: [] for i in range(n)}
+    for a, b in edges:
+        children[a].append(b)
+    counts = []
+    for start in range(n):
+        seen, stack = set(), [start]
+        while stack:
+            for child in children[stack.pop()]:
+                if child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+        counts.append(len(seen))
+    return counts
+
+
+def test_reachability_and_order_on_random_dag(monkeypatch):
+    rng = random.Random(0)
+    n = 300
+    ids = [10 + 3 * i for i in range(n)]
+    edges = sorted({(a, b) for a, b in ((rng.randrange(n), rng.randrange(n)) for _ in range(700)) if a < b})
+    graph = CausalGraph(ids, [ids[a] for a, _ in edges], [ids[b] for _, b in edges])
+    expected = brute_force_descendants(n, edges)
+    # A small budget forces several bitset blocks
+    monkeypatch.setattr(causal_graph, 'BITSET_BUDGET', 4096)
+    assert graph.descendant_counts().tolist() == expected
+    assert len(graph.reachable(ids[0])) == expected[0]
+    assert sorted(graph.dfs(ids[0]).tolist()) == sorted(graph.reachable(ids[0]).tolist())
+    position = {event_id: i for i, event_id in enumerate(graph.topological_order().tolist())}
+    assert all(position[ids[a]] < position[ids[b]] for a, b in edges)
+    best = max(range(n), key=lambda i: (expected[i], -i))
+    assert graph.top_influential(1) == [(ids[best], expected[best])]
+
+
+def test_cycles_and_unknown_ids():
+    # 1 -> 2 -> 3 -> 1 is a cycle, 3 -> 4 leaves it, 9 is not an event
+    graph = CausalGraph([1, 2, 3, 4], [1, 2, 3, 3, 9], [2, 3, 1, 4, 1])
+    assert graph.link_count == 4
+    assert graph.has_cycle()
+    assert graph.find_cycle() == [2, 3, 1]
+    assert graph.descendant_counts().tolist() == [3, 3, 3, 0]
+    ids, depths = graph.bfs(1)
+    assert ids.tolist() == [2, 3, 4] and depths.tolist() == [1, 2, 3]
+    assert graph.reachable(4, 'upstream').tolist() == [3, 2, 1]
+    try:
+        graph.topological_order()
+    except ValueError:
+        pass
+    else:
+        assert False, 'cycle did not raise'
@@ -1,7 +1,13 @@
+import io
+import json
 import os
+import queue
 import tempfile
 import importlib
+import sqlite3
 import sys
+import threading
+import pytest
 sys.path.append('src')
 import db
 
@@ -48,3 +54,429 @@ def test_delete_event_removes_relationships():
     e2 = db.get_event_by_tag('tag2')
     assert 'tag1' not in (e2['affected_by'] or '')
     os.unlink(path)
+
+
+def test_links_are_two_way():
+    path = setup_temp_db()
+    db.insert_event('Cat','Topic','First','Country','2000-01-01',None,'','tag1','','')
+    db.insert_event('Cat','Topic','Second','Country','2000-01-02',None,'','tag2',['tag1'],[])
+    assert db.get_event_by_tag('tag1')['affects'] == 'tag2'
+    assert db.get_event_by_tag('tag2')['affected_by'] == 'tag1'
+    db.add_relation_tag('tag2', 'affected_by', 'tag1')
+    assert db.get_event_by_tag('tag1')['affects'] == 'tag2'
+    os.unlink(path)
+
+
+def test_init_db_migrates_legacy_link_strings():
+    tmp = tempfile.NamedTemporaryFile(delete=False)
+    tmp.close()
+    conn = sqlite3.connect(tmp.name)
+    conn.execute(
+        "CREATE TABLE events (id INTEGER PRIMARY KEY, category TEXT, topic TEXT, name TEXT,"
+        " country TEXT, date_start TEXT, date_end TEXT, description TEXT, tag TEXT UNIQUE,"
+        " affected_by TEXT, affects TEXT)"
+    )
+    conn.execute("INSERT INTO events VALUES (1,'C','T','A','X','2000-01-01',NULL,'','a','','b,missing')")
+    conn.execute("INSERT INTO events VALUES (2,'C','T','B','X','2001-01-01',NULL,'','b','a','')")
+    conn.commit()
+    conn.close()
+    os.environ['EVENTS_DB_FILE'] = tmp.name
+    importlib.reload(db)
+    db.init_db()
+    assert db.get_event_by_tag('a')['affects'] == 'b'
+    assert db.get_event_by_tag('b')['affected_by'] == 'a'
+    os.unlink(tmp.name)
+
+
+def test_connection_pool_reuses_per_thread():
+    path = setup_temp_db()
+    conn = db.connect_db()
+    conn.close()
+    assert db.connect_db() is conn
+    conn.close()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    seen = []
+    worker = threading.Thread(target=lambda: seen.append(db.connect_db()))
+    worker.start()
+    worker.join()
+    assert seen[0] is not conn
+    # The finished worker's connection is handed to the next new thread
+    again = []
+    worker = threading.Thread(target=lambda: again.append(db.connect_db()))
+    worker.start()
+    worker.join()
+    assert again[0] is seen[0]
+    db.close_pool()
+    os.unlink(path)
+
+
+def test_failed_write_releases_connection():
+    path = setup_temp_db()
+    first, second = db.get_events()[:2]
+    with pytest.raises(sqlite3.IntegrityError):
+        db.update_event(first['id'], tag=second['tag'])
+    conn = db.connect_db()
+    conn.close()
+    assert (conn.depth, conn.in_transaction) == (0, False)
+    # The failed write holds no lock, so other threads can still write
+    errors = []
+
+    def write():
+        try:
+            db.insert_event('Cat','Topic','New','Country','2000-01-01',None,'','tag-new','','')
+        except Exception as exc:
+            errors.append(exc)
+
+    worker = threading.Thread(target=write)
+    worker.start()
+    worker.join()
+    assert errors == []
+    assert db.get_event_by_tag('tag-new') is not None
+    db.close_pool()
+    os.unlink(path)
+
+
+def test_get_events_cache_tracks_writes():
+    path = setup_temp_db()
+    first = db.get_events()
+    first[0]['name'] = 'mutated'
+    assert db.get_events()[0]['name'] != 'mutated'
+    version = db.data_version()
+    assert db.data_version() == version
+    db.insert_event('Cat','Topic','New','Country','2000-01-01',None,'','tag-new','','')
+    assert db.data_version() != version
+    assert len(db.get_events()) == len(first) + 1
+    # Writes from another connection are picked up through PRAGMA data_version
+    other = sqlite3.connect(path)
+    other.execute("UPDATE events SET name = 'External' WHERE tag = 'tag-new'")
+    other.commit()
+    other.close()
+    assert db.get_event_by_tag('tag-new')['name'] == 'External'
+    assert any(e['name'] == 'External' for e in db.get_events())
+    db._event_cache.clear()
+    assert db._event_cache.get(db.data_version()) is None
+    assert len(db.get_events()) == len(first) + 1
+    os.unlink(path)
+
+
+class Worker(threading.Thread):
+    """Long-lived thread (like a gthread worker) running calls one at a time."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.calls = queue.Queue()
+        self.results = queue.Queue()
+        self.start()
+
+    def run(self):
+        while True:
+            fn = self.calls.get()
+            if fn is None:
+                return
+            self.results.put(fn())
+
+    def __call__(self, fn):
+        self.calls.put(fn)
+        return self.results.get()
+
+    def stop(self):
+        self.calls.put(None)
+        self.join()
+
+
+def test_data_version_baseline_and_external_writes_across_threads():
+    path = setup_temp_db()
+    version = db.data_version()
+    a, b = Worker(), Worker()
+    # New connections take a baseline instead of reporting a change
+    assert a(db.data_version) == b(db.data_version) == version
+    count = len(db.get_events())
+    # B writes and caches the new version; then another process writes
+    b(lambda: db.insert_event('Cat','Topic','New','Country','2000-01-01',None,'','tag-new','',''))
+    assert len(b(db.get_events)) == count + 1
+    other = sqlite3.connect(path)
+    other.execute("INSERT INTO events (category, topic, name, date_start, tag)"
+                  " VALUES ('Cat', 'Topic', 'External', '2000-01-01', 'tag-ext')")
+    other.commit()
+    other.close()
+    # A saw both writes at once and must not serve B's cached list
+    assert len(a(db.get_events)) == count + 2
+    assert len(b(db.get_events)) == count + 2
+    a.stop()
+    b.stop()
+    db.close_pool()
+    os.unlink(path)
+
+
+def test_events_overlapping_uses_current_data():
+    path = setup_temp_db()
+    tags = {e['tag'] for e in db.events_overlapping('1969-01-01', '1969-12-31')}
+    assert 'Science_Space_Moon_Landing_1969' in tags
+    assert 'Politics_War_World_War_I_1914' not in tags
+    db.insert_event('Cat','Topic','New','Country','1969-05-01',None,'','tag-new','','')
+    assert 'tag-new' in {e['tag'] for e in db.events_overlapping('1969-01-01', '1969-12-31')}
+    os.unlink(path)
+
+
+def test_query_events_date_window_uses_interval_index():
+    path = setup_temp_db()
+    cases = [
+        dict(start='1950-01-01', end='1970-01-01'),
+        dict(categories=['Science'], start='1900-01-01'),
+        dict(countries=['USA'], end='1970-01-01'),
+    ]
+    # The first window query is answered by SQLite while the index is built
+    from_sql = [db.query_events(**case) for case in cases]
+    db._warm_thread.join()
+    index = db._derived_indexes['intervals'][1]
+    from_index = [db.query_events(**case) for case in cases]
+    assert db.get_interval_index() is index
+    for got, expected in zip(from_index, from_sql):
+        assert got and sorted(got, key=lambda e: e['id']) == sorted(expected, key=lambda e: e['id'])
+    # A write makes the index stale: SQLite answers again until it is rebuilt
+    db.insert_event('Cat','Topic','New','Country','1969-05-01',None,'','tag-new','','')
+    assert 'tag-new' in {e['tag'] for e in db.query_events(**cases[0])}
+    db._warm_thread.join()
+    assert db._derived_indexes['intervals'][1] is not index
+    os.unlink(path)
+
+
+def test_interval_index_skipped_for_databases_over_the_cache_budget():
+    path = setup_temp_db()
+    db._event_cache.max_bytes = 1024
+    db._warm_thread = None
+    assert db.query_events(start='1950-01-01', end='1970-01-01')
+    # No background build, so the full table is never decoded
+    assert db._warm_thread is None
+    assert db._event_cache.get(db.data_version()) is None
+    # Nor is an index holding the event dicts kept when the cache rejects them
+    assert len(db.get_interval_index()) == len(db.get_events())
+    assert db._event_cache.rejected(db.data_version())
+    assert 'intervals' not in db._derived_indexes
+    os.unlink(path)
+
+
+def test_match_events_prefix_then_full_text():
+    path = setup_temp_db()
+    names = [e['name'] for e in db.match_events('war', 10)]
+    assert set(names[:3]) == {'Cold War', 'World War I', 'World War II'}
+    assert len(names) == 3
+    assert [e['name'] for e in db.match_events('moon', 10)] == ['Moon Landing']
+    assert len(db.match_events('', 2)) == 2
+    # Words that no name or tag starts with are found through the FTS index
+    assert [e['name'] for e in db.match_events('space', 10)] == ['Moon Landing']
+    # The index keeps labels only, not the cached event dicts
+    assert all(isinstance(label, tuple) for label in db.get_name_index()._labels)
+    labels = db.get_event_labels(['Science_Space_Moon_Landing_1969', 'missing'])
+    assert [e['name'] for e in labels] == ['Moon Landing']
+    os.unlink(path)
+
+
+def test_get_event_labels_chunks_large_selections():
+    path = setup_temp_db()
+    tags = [e['tag'] for e in db.get_events()]
+    wanted = ['missing-%d' % i for i in range(2 * db.IN_CHUNK_SIZE)] + tags[::-1]
+    labels = db.get_event_labels(wanted)
+    assert [e['tag'] for e in labels] == tags[::-1]
+    os.unlink(path)
+
+
+def test_get_event_by_id_and_facets():
+    path = setup_temp_db()
+    ev = db.get_event_by_tag('Science_Space_Moon_Landing_1969')
+    assert db.get_event_by_id(ev['id']) == ev
+    assert db.get_event_by_id(-1) is None
+    facets = db.get_facets()
+    assert facets['categories'] == ['Culture', 'Politics', 'Science']
+    assert facets['countries'] == ['Germany', 'Global', 'USA']
+    assert 'Space' in facets['topics']
+    db.insert_event('Science','Topic','Stateless','','2000-01-01',None,'','tag-blank','','')
+    assert db.get_facets()['countries'] == ['Germany', 'Global', 'USA']
+    assert db.get_facets(include_empty=True)['countries'] == ['', 'Germany', 'Global', 'USA']
+    os.unlink(path)
+
+
+def test_import_events_batches_and_resolves_links():
+    path = setup_temp_db()
+    src = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+    src.write(
+        'category,topic,name,country,date_start,date_end,description,affects,affected_by\n'
+        'Science,Physics,Relativity,Germany,1905-06-30,,Special relativity,Science_Physics_Atomic_Bomb_1945,\n'
+        'Science,Physics,Atomic Bomb,USA,1945-07-16,,,,Politics_War_World_War_II_1939\n'
+        'Science,Physics,Relativity,Germany,1905-06-30,,duplicate,,\n'
+        'Science,,No Topic,USA,1950-01-01,,,,\n'
+        'Science,Physics,Bad Date,USA,not-a-date,,,,\n'
+    )
+    src.close()
+    rejects = io.StringIO()
+    stats = db.import_events(src.name, batch_size=2, rejects=rejects)
+    assert (stats['read'], stats['inserted'], stats['rejected'], stats['links']) == (5, 2, 3, 2)
+    reasons = {json.loads(line)['line']: json.loads(line)['reason']
+               for line in rejects.getvalue().splitlines()}
+    assert reasons[4].startswith('duplicate tag')
+    assert reasons[5] == 'missing topic'
+    assert reasons[6].startswith('invalid date_start')
+    bomb = db.get_event_by_tag('Science_Physics_Atomic_Bomb_1945')
+    assert set(bomb['affected_by'].split(',')) == {
+        'Science_Physics_Relativity_1905', 'Politics_War_World_War_II_1939'}
+    os.unlink(src.name)
+    os.unlink(path)
+
+
+def test_import_events_rejects_non_string_fields():
+    path = setup_temp_db()
+    src = tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False)
+    rows = [
+        {'category': 5, 'topic': 'T', 'name': 'Numeric category', 'date_start': '1900-01-01'},
+        {'category': 'C', 'topic': 'T', 'name': 'Numeric links', 'date_start': '1900-01-01',
+         'affects': 7},
+        {'category': 'C', 'topic': 'T', 'name': 'Mixed links', 'date_start': '1900-01-01',
+         'affected_by': ['ok', 3]},
+        {'category': 'C', 'topic': 'T', 'name': 'Nested', 'date_start': {'year': 1900}},
+        {'category': 'C', 'topic': 'T', 'name': 'Fine', 'date_start': '1900-01-01',
+         'affects': ['Science_Space_Moon_Landing_1969']},
+    ]
+    src.write(''.join(json.dumps(row) + '\n' for row in rows))
+    src.close()
+    rejects = io.StringIO()
+    stats = db.import_events(src.name, rejects=rejects)
+    assert (stats['read'], stats['inserted'], stats['rejected'], stats['links']) == (5, 1, 4, 1)
+    reasons = [json.loads(line)['reason'] for line in rejects.getvalue().splitlines()]
+    assert reasons == [
+        'invalid category: expected a string, got int',
+        'invalid affects: expected a string, got int',
+        'invalid affected_by: expected a list of tags',
+        'invalid date_start: expected a string, got dict',
+    ]
+    assert db.get_event_by_tag('C_T_Fine_1900')['affects'] == 'Science_Space_Moon_Landing_1969'
+    os.unlink(src.name)
+    os.unlink(path)
+
+
+def test_export_events_jsonl_filters_in_chunks():
+    path = setup_temp_db()
+    out = tempfile.NamedTemporaryFile(suffix='.jsonl', delete=False)
+    out.close()
+    stats = db.export_events(out.name, categories=['Politics'], start='1950-01-01', chunk_size=1)
+    with open(out.name, encoding='utf-8') as fh:
+        rows = [json.loads(line) for line in fh]
+    assert stats['exported'] == 2
+    assert [r['name'] for r in rows] == ['Cold War', 'Fall of Berlin Wall']
+    assert rows[0]['affects'] == 'Politics_Conflict_Fall_of_Berlin_Wall_1989'
+    assert db.export_events(out.name, countries=[])['exported'] == 0
+    os.unlink(out.name)
+    os.unlink(path)
+
+
+def test_export_events_parquet():
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = setup_temp_db()
+    out = tempfile.NamedTemporaryFile(suffix='.parquet', delete=False)
+    out.close()
+    assert db.export_events(out.name, chunk_size=4)['exported'] == 6
+    table = pq.read_table(out.name)
+    assert table.column_names == list(db.EXPORT_FIELDS)
+    assert table.num_rows == 6
+    os.unlink(out.name)
+    os.unlink(path)
+
+
+def test_search_events_ranked_and_kept_in_sync():
+    path = setup_temp_db()
+    assert [e['name'] for e in db.search_events('war')][:2] == ['World War I', 'World War II']
+    assert [e['name'] for e in db.search_events('apollo moon')] == ['Moon Landing']
+    assert db.search_events('"(*') == []
+    db.insert_event('Politics', 'Diplomacy', 'Treaty of Versailles', 'Global', '1919-06-28',
+                    None, 'Peace treaty ending World War I', 'treaty', '', '')
+    ev = db.get_event_by_tag('treaty')
+    assert [e['tag'] for e in db.search_events('treat')] == ['treaty']
+    db.update_event(ev['id'], description='Signed in the Hall of Mirrors')
+    assert db.search_events('peace') == []
+    assert db.count_events(search='mirrors', start='1900-01-01') == 1
+    db.delete_event(ev['id'])
+    assert db.search_events('versailles') == []
+    os.unlink(path)
+
+
+def test_causal_chain_depth_cycles_and_fanout():
+    path = setup_temp_db()
+    root = 'Politics_War_World_War_I_1914'
+    chain = db.get_causal_chain(root)
+    assert [(n['name'], n['depth']) for n in chain] == [
+        ('World War II', 1), ('Cold War', 2), ('Moon Landing', 2), ('Fall of Berlin Wall', 3)]
+    assert chain[3]['parents'] == ['Politics_Conflict_Cold_War_1947']
+    # A cycle back to the root neither loops nor lists the root
+    db.add_relation_tag('Politics_Conflict_Fall_of_Berlin_Wall_1989', 'affects', root)
+    assert len(db.get_causal_chain(root, max_depth=20)) == 4
+    upstream = db.get_causal_chain('Politics_Conflict_Cold_War_1947', 'upstream', max_depth=1)
+    assert [n['name'] for n in upstream] == ['World War II']
+    capped = db.get_causal_chain(root, max_fanout=1)
+    assert capped[0]['truncated'] and len(capped) == 3
+    assert db.get_causal_chain('missing') == []
+    os.unlink(path)
+
+
+def test_reachable_tags_follow_the_causal_graph(monkeypatch):
+    pytest.importorskip('numpy')
+    path = setup_temp_db()
+    # The graph and the tags come from ids and links, never the decoded events
+    monkeypatch.setattr(db, '_cached_events', lambda version: pytest.fail('events decoded'))
+    assert db.reachable_tags('Politics_War_World_War_II_1939') == [
+        'Politics_Conflict_Cold_War_1947', 'Science_Space_Moon_Landing_1969',
+        'Politics_Conflict_Fall_of_Berlin_Wall_1989']
+    assert db.reachable_tags('Science_Space_Moon_Landing_1969', 'upstream') == [
+        'Politics_War_World_War_II_1939', 'Politics_War_World_War_I_1914']
+    db.add_relation_tag('Culture_Music_Woodstock_Festival_1969', 'affected_by',
+                        'Science_Space_Moon_Landing_1969')
+    assert 'Culture_Music_Woodstock_Festival_1969' in db.reachable_tags('Politics_War_World_War_I_1914')
+    os.unlink(path)
+
+
+def test_slow_query_log_records_plan(monkeypatch):
+    path = setup_temp_db()
+    db._slow_queries.clear()
+    monkeypatch.setattr(db, 'SLOW_QUERY_MS', 1e-9)
+    db.query_events(categories=['Science'])
+    entry = next(e for e in db.slow_queries() if 'e.category IN' in e['sql'])
+    assert entry['params'] == ['Science']
+    assert any('idx_events_category_country_start' in line for line in entry['plan'])
+    monkeypatch.setattr(db, 'SLOW_QUERY_MS', 0)
+    db._slow_queries.clear()
+    db.query_events()
+    assert db.slow_queries() == []
+    os.unlink(path)
+
+
+def test_check_query_plans_flags_missing_indexes():
+    path = setup_temp_db()
+    out = io.StringIO()
+    assert db.check_query_plans(out) == []
+    conn = sqlite3.connect(path)
+    conn.execute('DROP INDEX idx_event_links_target')
+    conn.commit()
+    conn.close()
+    problems = db.check_query_plans(out)
+    assert 'delete_event' in {label for label, _, _ in problems}
+    assert db.DB_FILE == path
+    os.unlink(path)
+
+
+def test_forked_child_opens_its_own_connection():
+    if not hasattr(os, 'fork'):
+        pytest.skip('needs os.fork')
+    path = setup_temp_db()
+    parent = db.connect_db()
+    parent.close()
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        conn = db.connect_db()
+        ok = conn is not parent and len(db.get_events()) == 6
+        conn.close()
+        os.write(write, b'1' if ok else b'0')
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert os.read(read, 1) == b'1'
+    assert db.connect_db() is parent
+    parent.close()
+    os.unlink(path)
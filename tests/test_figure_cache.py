@@ -0,0 +1,23 @@
+import sys
+sys.path.append('src')
+import plotly.graph_objects as go
+from figure_cache import FigureCache
+
+
+def figure(n):
+    return go.Figure(go.Scatter(x=list(range(n)), y=list(range(n))))
+
+
+def test_lru_eviction_by_count_and_bytes():
+    cache = FigureCache(max_entries=2)
+    cache.put('a', figure(1))
+    cache.put('b', figure(1))
+    assert cache.get('a') is not None  # 'b' becomes least recently used
+    cache.put('c', figure(1))
+    assert cache.get('b') is None
+    assert cache.stats()['evictions'] == 1
+
+    small = FigureCache(max_entries=10, max_bytes=cache.stats()['bytes'])
+    small.put('big', figure(5000))
+    assert small.get('big') is None
+    assert small.stats()['entries'] == 0
@@ -0,0 +1,45 @@
+import random
+import sys
+sys.path.append('src')
+from intervals import IntervalIndex
+
+
+def make_events(n, seed=0):
+    rng = random.Random(seed)
+    events = []
+    for i in range(n):
+        start = rng.randint(1000, 2000)
+        end = start + rng.randint(0, 50) if rng.random() < 0.7 else None
+        events.append({
+            'tag': f't{i}',
+            'date_start': f'{start:04d}-01-01',
+            'date_end': f'{end:04d}-01-01' if end else None,
+        })
+    return events
+
+
+def brute_force(events, start, end):
+    return {
+        e['tag'] for e in events
+        if (start is None or (e['date_end'] or e['date_start']) >= start)
+        and (end is None or e['date_start'] <= end)
+    }
+
+
+def test_overlapping_matches_linear_scan():
+    events = make_events(500)
+    index = IntervalIndex(events)
+    rng = random.Random(1)
+    windows = [(None, None), ('1500-01-01', None), (None, '1200-01-01')]
+    for _ in range(50):
+        a = rng.randint(990, 2060)
+        b = a + rng.randint(0, 100)
+        windows.append((f'{a:04d}-01-01', f'{b:04d}-06-01'))
+    for start, end in windows:
+        got = [e['tag'] for e in index.overlapping(start, end)]
+        assert len(got) == len(set(got))
+        assert set(got) == brute_force(events, start, end)
+
+
+def test_empty_index():
+    assert IntervalIndex([]).overlapping('2000-01-01', '2001-01-01') == []
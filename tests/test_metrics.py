@@ -0,0 +1,65 @@
+import sys
+sys.path.append('src')
+import metrics
+
+
+def test_disabled_instrument_returns_function_unchanged(monkeypatch):
+    monkeypatch.setattr(metrics, 'ENABLED', False)
+
+    def fn():
+        return [1]
+    assert metrics.instrument('db')(fn) is fn
+    assert metrics.timer('db', 'block') is metrics.timer('db', 'other')
+
+
+def test_enabled_instrument_records_latency_rows_and_errors(monkeypatch):
+    monkeypatch.setattr(metrics, 'ENABLED', True)
+    metrics.registry.clear()
+
+    @metrics.instrument('db')
+    def rows(n):
+        return list(range(n))
+
+    @metrics.instrument('db')
+    def bounds():
+        return ('1900-01-01', '2000-01-01')
+
+    @metrics.instrument('callback', 'graph.figure')
+    def fails():
+        raise RuntimeError('boom')
+
+    rows(3)
+    rows(4)
+    bounds()
+    try:
+        fails()
+    except RuntimeError:
+        pass
+    with metrics.timer('timeline', 'block'):
+        pass
+    metrics.registry.observe_response('timeline-graph.figure', 5000)
+    text = metrics.registry.render()
+    assert 'timeline_call_seconds_count{kind="db",name="rows"} 2' in text
+    assert 'timeline_call_seconds_bucket{kind="db",name="rows",le="+Inf"} 2' in text
+    assert 'timeline_call_rows_total{kind="db",name="rows"} 7' in text
+    assert 'timeline_call_seconds_count{kind="db",name="bounds"} 1' in text
+    assert 'timeline_call_rows_total{kind="db",name="bounds"}' not in text
+    assert 'timeline_call_errors_total{kind="callback",name="graph.figure"} 1' in text
+    assert 'timeline_call_seconds_count{kind="timeline",name="block"} 1' in text
+    assert 'timeline_callback_response_bytes_bucket{output="timeline-graph.figure",le="4096"} 0' in text
+    assert 'timeline_callback_response_bytes_sum{output="timeline-graph.figure"} 5000' in text
+    metrics.registry.clear()
+
+
+def test_instrument_module_wraps_only_named_functions(monkeypatch):
+    monkeypatch.setattr(metrics, 'ENABLED', True)
+
+    def query():
+        return []
+
+    def helper():
+        return ()
+    namespace = {'__name__': 'fake', 'query': query, 'helper': helper}
+    metrics.instrument_module(namespace, 'db', ('query',))
+    assert namespace['query'] is not query and namespace['query'].__wrapped__ is query
+    assert namespace['helper'] is helper
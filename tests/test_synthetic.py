@@ -0,0 +1,15 @@
+import sys
+sys.path.append('benchmarks')
+from synthetic import generate_events
+
+
+def test_generator_is_deterministic_and_honours_knobs():
+    first = list(generate_events(2000, seed=3, categories=2, countries=3, instants=0.5))
+    assert first == list(generate_events(2000, seed=3, categories=2, countries=3, instants=0.5))
+    assert first != list(generate_events(2000, seed=4, categories=2, countries=3, instants=0.5))
+    assert len({e['category'] for e in first}) == 2
+    assert len({e['country'] for e in first}) == 3
+    assert 0.45 < sum(e['date_end'] is None for e in first) / len(first) < 0.55
+    # Links only point forward, so every tag resolves once the file is loaded
+    assert all(int(t[3:]) > i for i, e in enumerate(first) for t in e['affects'])
+    assert not any(e['affects'] for e in generate_events(100, links=0))
@@ -1,10 +1,14 @@
+import base64
 import os
 import tempfile
 import importlib
+import random
 import sys
+from datetime import date, timedelta
 sys.path.append('src')
 import db
 import types
+import numpy as np
 import dash
 
 # Prevent register_page from failing when importing timeline
@@ -28,3 +32,215 @@ def test_filter_events_category():
     filtered = timeline.filter_events(events, categories=['Science'])
     assert all(e['category'] == 'Science' for e in filtered)
     os.unlink(path)
+
+
+def test_query_events_matches_filter_events():
+    path = setup_temp_db()
+    events = db.get_events()
+    cases = [
+        dict(categories=['Politics'], countries=['Global', 'Germany']),
+        dict(start_date='1950-01-01', end_date='1970-01-01'),
+        dict(categories=['Science', 'Culture'], start_date='1969-08-01'),
+        dict(categories=[]),
+    ]
+    for case in cases:
+        expected = {e['tag'] for e in timeline.filter_events(events, **case)}
+        got = db.query_events(case.get('categories'), case.get('countries'),
+                              case.get('start_date'), case.get('end_date'))
+        assert {e['tag'] for e in got} == expected
+    os.unlink(path)
+
+
+def random_events(n, seed=0):
+    rng = random.Random(seed)
+    events = []
+    for i in range(n):
+        start = rng.randint(0, 2000)
+        end = start + rng.randint(0, 300) if rng.random() < 0.7 else None
+        events.append({
+            'tag': f't{i}',
+            'category': rng.choice(['Politics', 'Science', 'Culture']),
+            'country': rng.choice(['USA', 'Germany', 'Global']),
+            'date_start': str(date(1900, 1, 1) + timedelta(days=start)),
+            'date_end': str(date(1900, 1, 1) + timedelta(days=end)) if end else None,
+        })
+    return events
+
+
+def test_engines_agree():
+    events = random_events(400)
+    for case in [dict(), dict(categories=['Science'], countries=['USA', 'Global']),
+                 dict(start_date='1901-01-01', end_date='1902-06-30'), dict(countries=[])]:
+        python = timeline.filter_events(events, engine='python', **case)
+        columnar = timeline.filter_events(events, engine='columnar', **case)
+        assert [e['tag'] for e in python] == [e['tag'] for e in columnar]
+    a = [dict(e) for e in events]
+    b = [dict(e) for e in events]
+    assert timeline.assign_rows(a, engine='python') == timeline.assign_rows(b, engine='columnar')
+    assert [e['row_id'] for e in a] == [e['row_id'] for e in b]
+
+
+def test_pack_lanes_matches_linear_first_fit():
+    rng = random.Random(3)
+    spans = sorted((s, s + rng.randint(0, 40)) for s in (rng.randint(0, 500) for _ in range(300)))
+    slots, expected = [], []
+    for start, end in spans:
+        idx = next((i for i, last in enumerate(slots) if start >= last), len(slots))
+        if idx == len(slots):
+            slots.append(end)
+        slots[idx] = end
+        expected.append(idx)
+    assert timeline.pack_lanes(spans) == (expected, len(slots))
+
+
+def test_flags_as_annotations_or_text_traces():
+    path = setup_temp_db()
+    events = db.get_events()
+    fig = timeline.make_timeline_figure([dict(e) for e in events], flag_mode='annotations')
+    assert len(fig.layout.annotations) == len(events)
+    fig = timeline.make_timeline_figure([dict(e) for e in events], flag_mode='trace')
+    assert len(fig.layout.annotations) == 0
+    flag_traces = [t for t in fig.data if t.type == 'scatter' and t.mode == 'text']
+    assert sum(len(t.text) for t in flag_traces) == len(events)
+    assert {t.name for t in flag_traces} == {'Politics (flags)', 'Science (flags)', 'Culture (flags)'}
+    os.unlink(path)
+
+
+def test_causal_arrows_are_batched_traces():
+    path = setup_temp_db()
+    events = db.get_events()
+    fig = timeline.make_timeline_figure(events, show_arrows=True, flag_mode='trace')
+    assert len(fig.layout.annotations) == 0
+    links = [t for t in fig.data if t.name == 'causal links']
+    heads = [t for t in links if t.mode == 'markers']
+    assert len(heads) == 1
+    # Seed data: WWI->WWII, WWII->Cold War, WWII->Moon Landing, Cold War->Berlin Wall
+    assert len(heads[0].x) == 4
+    by_tag = {e['tag']: e for e in events}
+    assert by_tag['Politics_War_World_War_II_1939']['date_start'] in heads[0].x
+    os.unlink(path)
+
+
+def test_figure_cache_hits_until_data_changes():
+    path = setup_temp_db()
+    timeline._figure_cache.clear()
+    before = timeline.figure_cache_stats()
+    first = timeline.cached_timeline_figure(['Science', 'Politics'], None)
+    again = timeline.cached_timeline_figure(['Politics', 'Science'], None)
+    assert again == first
+    stats = timeline.figure_cache_stats()
+    assert stats['hits'] == before['hits'] + 1
+    assert stats['misses'] == before['misses'] + 1
+    db.insert_event('Science','Topic','New','USA','2000-01-01',None,'','tag-new','','')
+    timeline.cached_timeline_figure(['Politics', 'Science'], None)
+    assert timeline.figure_cache_stats()['misses'] == before['misses'] + 2
+    os.unlink(path)
+
+
+def test_default_filters_keep_events_without_country():
+    path = setup_temp_db()
+    timeline._figure_cache.clear()
+    db.insert_event('Science','Topic','Stateless','','2000-01-01','2000-02-01','','tag-blank','','')
+    page = timeline.layout()
+    dropdowns = {}
+    stack = [page]
+    while stack:
+        node = stack.pop()
+        if getattr(node, 'id', None) in ('filter-category', 'filter-country'):
+            dropdowns[node.id] = node
+        children = getattr(node, 'children', None)
+        stack.extend(children if isinstance(children, list) else [children] if children else [])
+    assert '' in dropdowns['filter-country'].value
+    fig = timeline.cached_timeline_figure(dropdowns['filter-category'].value,
+                                          dropdowns['filter-country'].value)
+    tags = {c[0] for t in fig['data'] if t.get('customdata') is not None
+            for c in t['customdata'] if c is not None}
+    assert 'tag-blank' in tags
+    os.unlink(path)
+
+
+def test_search_combines_with_filters():
+    path = setup_temp_db()
+    timeline._figure_cache.clear()
+    fig = timeline.cached_timeline_figure(['Politics'], None, search='war')
+    tags = {c[0] for t in fig['data'] if t.get('customdata') is not None
+            for c in t['customdata'] if c is not None}
+    assert tags == {'Politics_War_World_War_I_1914', 'Politics_War_World_War_II_1939',
+                    'Politics_Conflict_Cold_War_1947'}
+    assert timeline.search_matches('apollo') == ['Science_Space_Moon_Landing_1969']
+    assert timeline.search_matches('  ') is None
+    os.unlink(path)
+
+
+def test_highlight_events_selects_reachable_tags():
+    path = setup_temp_db()
+    fig = timeline.make_timeline_figure(db.get_events(), render_mode='webgl')
+    tags = {'Politics_War_World_War_II_1939', *db.reachable_tags('Politics_War_World_War_II_1939')}
+    highlighted = timeline.highlight_events(fig, tags)
+    selected = {t['customdata'][i][0] for t in highlighted['data'] if t.get('customdata') is not None
+                for i in t['selectedpoints']}
+    assert selected == tags
+    os.unlink(path)
+
+
+def test_viewport_range_parsing():
+    assert timeline.viewport_range(None) is None
+    assert timeline.viewport_range({'autosize': True}) is None
+    assert timeline.viewport_range({'xaxis.autorange': True}) is None
+    assert timeline.viewport_range({'xaxis.range[0]': '1950-03-12 04:33:12.5',
+                                    'xaxis.range[1]': '1970-01-01'}) == ('1950-03-12', '1970-01-01')
+    assert timeline.viewport_range({'xaxis.range': ['1900-01-01', '1910-01-01']}) == ('1900-01-01', '1910-01-01')
+    assert not timeline.x_axis_changed({'autosize': True})
+    assert timeline.x_axis_changed({'xaxis.autorange': True})
+
+
+def test_wide_viewport_switches_to_density_summary(monkeypatch):
+    path = setup_temp_db()
+    timeline._figure_cache.clear()
+    monkeypatch.setattr(timeline, 'LOD_MAX_BARS', 2)
+    fig = timeline.cached_timeline_figure(viewport=('1900-01-01', '2000-01-01'))
+    assert [t['type'] for t in fig['data']] == ['heatmap']
+    z = fig['data'][0]['z']
+    counts = np.frombuffer(base64.b64decode(z['bdata']), dtype=z['dtype'])
+    assert counts.sum() == 6
+    # Zooming in far enough shows individual bars again
+    fig = timeline.cached_timeline_figure(viewport=('1969-08-10', '1969-08-31'))
+    assert 'heatmap' not in [t['type'] for t in fig['data']]
+    assert fig['layout']['xaxis']['range'] == ['1969-08-10', '1969-08-31']
+    os.unlink(path)
+
+
+def test_webgl_render_mode_keeps_tags_and_colours():
+    path = setup_temp_db()
+    events = db.get_events()
+    svg = timeline.make_timeline_figure([dict(e) for e in events], render_mode='svg')
+    gl = timeline.make_timeline_figure([dict(e) for e in events], render_mode='webgl')
+    assert not any(t.type == 'scattergl' for t in svg.data)
+    bars = {t.name: t for t in gl.data if t.type == 'scattergl' and t.mode == 'lines'}
+    svg_colours = {t.name: t.marker.color for t in svg.data if t.type == 'bar'}
+    assert {name: t.line.color for name, t in bars.items()} == svg_colours
+    tags = {c[0] for t in gl.data if t.type == 'scattergl' and t.customdata is not None
+            for c in t.customdata if c is not None}
+    assert tags == {e['tag'] for e in events}
+    os.unlink(path)
+
+
+def test_timeline_snapshot_is_columnar_and_versioned():
+    path = setup_temp_db()
+    snap = timeline.timeline_snapshot()
+    assert len(snap['tag']) == len(snap['start']) == len(snap['row']) == 6
+    assert snap['categories'] == ['Culture', 'Politics', 'Science']
+    assert len(snap['links']) == 4
+    assert snap['topic'][0] and len(snap['description']) == 6
+    # The browser colours categories by first appearance, like the server
+    drawn = sorted(range(6), key=lambda i: (snap['row'][i], snap['start'][i]))
+    first_seen = list(dict.fromkeys(snap['categories'][snap['category'][i]] for i in drawn))
+    client = {cat: snap['palette'][i % len(snap['palette'])] for i, cat in enumerate(first_seen)}
+    fig = timeline.make_timeline_figure(db.get_events(), render_mode='webgl')
+    server = {t.name: t.line.color for t in fig.data if t.type == 'scattergl' and t.mode == 'lines'}
+    assert server == {cat: client[cat] for cat in server}
+    assert timeline.refresh_snapshot(1, snap['version']) == (dash.no_update, dash.no_update)
+    db.insert_event('Science','Topic','New','USA','2000-01-01',None,'','tag-new','','')
+    fresh, version = timeline.refresh_snapshot(2, snap['version'])
+    assert version != snap['version'] and len(fresh['tag']) == 7
+    os.unlink(path)